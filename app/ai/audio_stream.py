@@ -0,0 +1,103 @@
+import asyncio
+import os
+import tempfile
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # what Whisper expects
+MAX_AUDIO_SECONDS = int(os.getenv("MAX_AUDIO_SECONDS", "600"))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Containers whose index may sit at the end of the file; ffmpeg needs to seek
+SEEKABLE_SUFFIXES = (".m4a", ".mp4", ".mov", ".3gp", ".aac")
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+class AudioTooLongError(AudioDecodeError):
+    def __init__(self, max_seconds: int):
+        super().__init__(f"Audio is longer than {max_seconds} seconds")
+        self.max_seconds = max_seconds
+
+
+def _ffmpeg_cmd(source: str) -> list[str]:
+    return [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", source,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-",
+    ]
+
+
+async def _read_pcm(proc, max_samples: int, max_seconds: int) -> np.ndarray:
+    pcm = bytearray()
+    max_bytes = max_samples * 2
+    while True:
+        chunk = await proc.stdout.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        pcm.extend(chunk)
+        if len(pcm) > max_bytes:
+            raise AudioTooLongError(max_seconds)
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+
+async def _feed(proc, upload, chunk_size: int):
+    try:
+        while chunk := await upload.read(chunk_size):
+            proc.stdin.write(chunk)
+            await proc.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # ffmpeg stopped early; its exit code tells the story
+    finally:
+        proc.stdin.close()
+
+
+async def _wait(proc, reader, *others) -> np.ndarray:
+    try:
+        audio = await reader
+        await asyncio.gather(*others)
+        if await proc.wait() != 0:
+            raise AudioDecodeError(f"ffmpeg exited with code {proc.returncode}")
+        return audio
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+
+async def decode_upload(upload, max_seconds: int = MAX_AUDIO_SECONDS, chunk_size: int = UPLOAD_CHUNK_SIZE) -> np.ndarray:
+    """
+    Decode an uploaded audio file to 16 kHz mono float32 PCM for Whisper.
+
+    The upload is fed to ffmpeg chunk by chunk, so the encoded bytes are never
+    held in memory as a whole; only the decoded PCM is, capped at
+    `max_seconds`. Containers that ffmpeg cannot read from a pipe are spooled
+    to a temporary file that is removed before returning.
+    """
+    max_samples = max_seconds * SAMPLE_RATE
+    suffix = os.path.splitext(getattr(upload, "filename", "") or "")[1].lower()
+
+    if suffix in SEEKABLE_SUFFIXES:
+        with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+            while chunk := await upload.read(chunk_size):
+                tmp.write(chunk)
+            tmp.flush()
+            proc = await asyncio.create_subprocess_exec(
+                *_ffmpeg_cmd(tmp.name),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            return await _wait(proc, _read_pcm(proc, max_samples, max_seconds))
+
+    proc = await asyncio.create_subprocess_exec(
+        *_ffmpeg_cmd("pipe:0"),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    feeder = asyncio.create_task(_feed(proc, upload, chunk_size))
+    try:
+        return await _wait(proc, _read_pcm(proc, max_samples, max_seconds), feeder)
+    finally:
+        feeder.cancel()
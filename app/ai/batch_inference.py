@@ -0,0 +1,111 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from app.core import metrics
+
+IMAGE_BATCH_SIZE = int(os.getenv("IMAGE_BATCH_SIZE", "16"))
+IMAGE_BATCH_WAIT_MS = float(os.getenv("IMAGE_BATCH_WAIT_MS", "10"))
+
+queue_depth = metrics.gauge("image_batch_queue_depth", "Images waiting to join a batch")
+batch_size = metrics.histogram(
+    "image_batch_size", "Images per model call", buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+batch_seconds = metrics.histogram("image_batch_seconds", "Model time per batch, on the inference thread")
+
+
+class BatchPredictor:
+    """
+    Groups single-image predictions from concurrent requests into one batch.
+
+    Requests are queued on the event loop; a collector task flushes the queue
+    when `max_batch_size` images are waiting or the oldest one has waited
+    `max_wait_ms`. The model itself runs on a dedicated thread so the loop
+    stays free while Keras works. Pass `model_loader` instead of `model` to
+    load it lazily on that thread.
+    """
+
+    def __init__(
+        self,
+        model=None,
+        labels: Optional[dict[int, str]] = None,
+        max_batch_size: int = IMAGE_BATCH_SIZE,
+        max_wait_ms: float = IMAGE_BATCH_WAIT_MS,
+        model_loader: Optional[Callable[[], object]] = None,
+    ):
+        self.model = model
+        self.model_loader = model_loader
+        self.labels = labels or {}
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-batch")
+
+    def _ensure_started(self):
+        if self._collector is None or self._collector.done():
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+
+    async def predict(self, image: np.ndarray) -> Tuple[str, float]:
+        """Classify one preprocessed (H, W, C) image; returns (label, confidence)."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future))
+        queue_depth.set(self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            image, future = await self._queue.get()
+            batch = [(image, future)]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            queue_depth.set(self._queue.qsize())
+            await self._run_batch(batch)
+
+    async def _run_batch(self, batch):
+        images = np.stack([image for image, _ in batch])
+        loop = asyncio.get_running_loop()
+        batch_size.observe(len(batch))
+        start = loop.time()
+        try:
+            predictions = await loop.run_in_executor(self._executor, self._predict_blocking, images)
+            batch_seconds.observe(loop.time() - start)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), scores in zip(batch, predictions):
+            if future.done():  # caller went away
+                continue
+            class_index = int(np.argmax(scores))
+            future.set_result((self.labels.get(class_index, "other"), float(scores[class_index])))
+
+    def _predict_blocking(self, images: np.ndarray) -> np.ndarray:
+        if self.model is None:
+            self.model = self.model_loader()
+        return np.asarray(self.model.predict(images, batch_size=len(images), verbose=0))
+
+    async def aclose(self):
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+        self._executor.shutdown(wait=False)
@@ -1,51 +1,141 @@
-import requests
-import json
+import time
+
+import httpx
+
+from app.ai.llm_client import OLLAMA_MODEL, OLLAMA_URL, LLMRequestError, OllamaClient
+from app.ai.local_classifier import LOCAL_CLASSIFIER_THRESHOLD, LocalComplaintClassifier
+from app.ai.result_cache import ResultCache
+from app.core import metrics
+from app.core.log import get_logger
+from app.core.tracing import stage
+
+log = get_logger(__name__)
+
+classifications = metrics.counter(
+    "complaint_classifications_total", "Complaints classified, by tier that answered", ["tier"]
+)
+llm_classify_seconds = metrics.histogram("llm_classify_seconds", "Latency of LLM classification calls")
+latency_saved_seconds = metrics.counter(
+    "local_classifier_latency_saved_seconds_total",
+    "Estimated LLM time avoided by the local tier (mean LLM latency per hit)",
+)
+
+VALID_CATEGORIES = [
+    "neighbor", "noise", "dogs", "cars", "city_services",
+    "robbery", "assault", "utilities", "internet", "electricity", "water", "phone"
+]
+
+
+def normalize_category(result_text: str) -> str:
+    """Map raw model output onto one of VALID_CATEGORIES, or "unknown"."""
+    result_text = result_text.strip().lower()
+    for cat in VALID_CATEGORIES:
+        if cat in result_text:
+            return cat
+    return "unknown"
+
 
 class ComplaintClassifier:
-    def __init__(self, base_url="http://localhost:11434/api/generate", model="llama3.2"):
-        self.base_url = base_url
-        self.model = model
+    def __init__(
+        self,
+        base_url=OLLAMA_URL,
+        model=OLLAMA_MODEL,
+        client: OllamaClient | None = None,
+        local: LocalComplaintClassifier | None = None,
+        threshold: float | None = LOCAL_CLASSIFIER_THRESHOLD,
+        cache: ResultCache | None = None,
+    ):
+        self.client = client or OllamaClient(base_url=base_url, model=model)
+        self.base_url = self.client.base_url
+        self.model = self.client.model
+        self.local = local
+        # An explicit cutoff wins over the one calibrated with the model
+        self.threshold = threshold if threshold is not None else getattr(local, "threshold", None)
+        if self.threshold is None:
+            self.local = None
+        self.cache = cache
 
-    def classify_complaint(self, text: str) -> str:
-        """
-        Sends complaint text to local Ollama model and extracts clean response.
-        """
-        prompt = f"""
+    def _classify_locally(self, text: str) -> str | None:
+        """Return the local tier's answer when it is confident enough, else None."""
+        if self.local is None:
+            return None
+        category, confidence = self.local.predict(text)
+        if confidence < self.threshold:
+            return None
+        classifications.inc(tier="local")
+        latency_saved_seconds.inc(llm_classify_seconds.mean())
+        return category
+
+    def stats(self) -> dict:
+        local_hits = classifications.value(tier="local")
+        cache_hits = classifications.value(tier="cache")
+        llm_calls = classifications.value(tier="llm")
+        total = local_hits + cache_hits + llm_calls
+        return {
+            "local_hits": int(local_hits),
+            "cache_hits": int(cache_hits),
+            "llm_calls": int(llm_calls),
+            "hit_rate": local_hits / total if total else 0.0,
+            "threshold": self.threshold,
+            "mean_llm_seconds": llm_classify_seconds.mean(),
+            "latency_saved_seconds": latency_saved_seconds.value(),
+        }
+
+    def build_prompt(self, text: str) -> str:
+        return f"""
         Classify this citizen complaint into one of the following categories:
         [neighbor, noise, dogs, cars, city_services, robbery, assault, utilities (internet, electricity, water, phone)]
         Complaint: {text}
         Reply with only the category name.
         """
 
-        response = requests.post(self.base_url, json={"model": self.model, "prompt": prompt}, stream=True)
-        
-        if response.status_code == 200:
-            result_text = ""
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        data = json.loads(line.decode("utf-8"))
-                        if "response" in data:
-                            result_text += data["response"]
-                    except json.JSONDecodeError:
-                        continue
-
-          
-            result_text = result_text.strip().lower()
-
-            print("Model raw output:", result_text)
-
-           
-            valid_categories = [
-                "neighbor", "noise", "dogs", "cars", "city_services",
-                "robbery", "assault", "utilities", "internet", "electricity", "water", "phone"
-            ]
-
-            for cat in valid_categories:
-                if cat in result_text:
-                    return cat
+    def parse_category(self, result_text: str) -> str:
+        log.debug("classifier raw output", output=result_text.strip().lower()[:200], sample=True)
+        return normalize_category(result_text)
+
+    async def aclassify_complaint(self, text: str) -> str:
+        """
+        Answers from the local tier when it is confident, otherwise sends
+        complaint text to local Ollama model and extracts clean response.
+        """
+        category = self._classify_locally(text)
+        if category is not None:
+            return category
+
+        if self.cache is not None:
+            category = await self.cache.get(text)
+            if category is not None:
+                classifications.inc(tier="cache")
+                return category
+
+        classifications.inc(tier="llm")
+        start = time.perf_counter()
+        try:
+            with stage("llm_classify"):
+                result_text = await self.client.generate(self.build_prompt(text))
+        except (LLMRequestError, httpx.HTTPError) as e:
+            log.warning("classification request failed", error=str(e))
+            return "unknown"
+        llm_classify_seconds.observe(time.perf_counter() - start)
+
+        category = self.parse_category(result_text)
+        if self.cache is not None and category != "unknown":
+            await self.cache.set(text, category)
+        return category
+
+    def classify_complaint(self, text: str) -> str:
+        """
+        Blocking variant of `aclassify_complaint` for non-async callers.
+        """
+        category = self._classify_locally(text)
+        if category is not None:
+            return category
 
+        classifications.inc(tier="llm")
+        try:
+            result_text = self.client.generate_sync(self.build_prompt(text))
+        except (LLMRequestError, httpx.HTTPError) as e:
+            log.warning("classification request failed", error=str(e))
             return "unknown"
 
-        print(" Ollama request failed:", response.status_code, response.text)
-        return "unknown"
+        return self.parse_category(result_text)
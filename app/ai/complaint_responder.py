@@ -1,18 +1,81 @@
-import requests
 import json
+import time
+
+import httpx
+
+from app.ai.complaint_classifier import normalize_category
+from app.ai.llm_client import OLLAMA_MODEL, OLLAMA_URL, LLMRequestError, OllamaClient
+from app.ai.result_cache import ResultCache
+from app.core.log import get_logger
+from app.core.tracing import stage, stage_seconds
+from typing import AsyncIterator
+
+log = get_logger(__name__)
+
+FALLBACK_REPLY = "شكرًا لتواصلك معنا، تم استلام الشكوى وسيتم متابعتها قريبًا."
+
+# The model never sees the citizen's name: it writes this marker instead and
+# the name is filled in afterwards, so cached replies stay anonymous
+NAME_PLACEHOLDER = "<<citizen_name>>"
+
+
+def personalize(template: str, citizen_name: str) -> str:
+    return template.replace(NAME_PLACEHOLDER, citizen_name)
+
+
+def is_cacheable(template: str, citizen_name: str) -> bool:
+    """Only anonymous templates are shared: the marker was used and no part of the name slipped in."""
+    if NAME_PLACEHOLDER not in template:
+        return False
+    lowered = template.lower()
+    return not any(part in lowered for part in citizen_name.lower().split() if len(part) > 1)
+
+
+async def personalize_stream(tokens: AsyncIterator[str], citizen_name: str) -> AsyncIterator[str]:
+    """Fill the marker into a token stream, holding back text that may be the start of a split marker."""
+    pending = ""
+    async for token in tokens:
+        pending = personalize(pending + token, citizen_name)
+        keep = 0
+        for size in range(min(len(pending), len(NAME_PLACEHOLDER) - 1), 0, -1):
+            if NAME_PLACEHOLDER.startswith(pending[-size:]):
+                keep = size
+                break
+        if len(pending) > keep:
+            yield pending[:len(pending) - keep]
+            pending = pending[len(pending) - keep:]
+    if pending:
+        yield pending
+
 
 class ComplaintResponder:
-    def __init__(self, base_url="http://localhost:11434/api/generate", model="llama3.2"):
-        self.base_url = base_url
-        self.model = model
+    def __init__(
+        self,
+        base_url=OLLAMA_URL,
+        model=OLLAMA_MODEL,
+        client: OllamaClient | None = None,
+        cache: ResultCache | None = None,
+    ):
+        self.client = client or OllamaClient(base_url=base_url, model=model)
+        self.base_url = self.client.base_url
+        self.model = self.client.model
+        self.cache = cache
 
-    def generate_reply(self, citizen_name: str, complaint_text: str, complaint_type: str) -> str:
-        """
-        توليد رد بشري طبيعي من نموذج Llama بناءً على نوع الشكوى ونصها.
-        """
-        prompt = f"""
+    async def _cached(self, key: str, partition: str, citizen_name: str):
+        if self.cache is None:
+            return None
+        cached = await self.cache.get(key, partition)
+        if cached is None:
+            return None
+        if isinstance(cached, tuple):
+            complaint_type, template = cached
+            return complaint_type, personalize(template, citizen_name)
+        return personalize(cached, citizen_name)
+
+    def build_prompt(self, complaint_text: str, complaint_type: str) -> str:
+        return f"""
         أنت موظف خدمة عملاء محترم في بلدية المدينة الذكية.
-        المواطن اسمه {citizen_name}.
+        عند مخاطبة المواطن باسمه اكتب {NAME_PLACEHOLDER} حرفيًا مكان الاسم ولا تكتب أي اسم آخر.
         نوع الشكوى: {complaint_type}.
         نص الشكوى: "{complaint_text}"
 
@@ -22,19 +85,114 @@ class ComplaintResponder:
         لا تتكلم كثيرا وقل المعلومه بشكل مناسب 
         """
 
-        response = requests.post(self.base_url, json={"model": self.model, "prompt": prompt}, stream=True)
-        if response.status_code == 200:
-            reply_text = ""
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        data = json.loads(line.decode("utf-8"))
-                        if "response" in data:
-                            reply_text += data["response"]
-                    except json.JSONDecodeError:
-                        continue
+    def build_combined_prompt(self, complaint_text: str) -> str:
+        return f"""
+        أنت موظف خدمة عملاء محترم في بلدية المدينة الذكية.
+        عند مخاطبة المواطن باسمه اكتب {NAME_PLACEHOLDER} حرفيًا مكان الاسم ولا تكتب أي اسم آخر.
+        نص الشكوى: "{complaint_text}"
+
+        أولاً صنّف الشكوى إلى واحدة من الفئات التالية:
+        [neighbor, noise, dogs, cars, city_services, robbery, assault, utilities]
+        ثم اكتب ردًا بشريًا لبقًا ومختصرًا يؤكد استلام الشكوى ويوضح الخطوة القادمة.
+
+        أجب بصيغة JSON فقط بالشكل التالي:
+        {{"category": "<category>", "reply": "<reply>"}}
+        """
+
+    async def agenerate_classified_reply(self, citizen_name: str, complaint_text: str) -> tuple[str, str]:
+        """
+        تصنيف الشكوى وتوليد الرد في استدعاء واحد للنموذج.
+        يعيد (complaint_type, reply).
+        """
+        cached = await self._cached(complaint_text, "combined", citizen_name)
+        if cached is not None:
+            return cached
+
+        prompt = self.build_combined_prompt(complaint_text)
+        try:
+            with stage("llm_classify_reply"):
+                raw = await self.client.generate(prompt, format="json")
+        except (LLMRequestError, httpx.HTTPError) as e:
+            log.warning("combined reply request failed", error=str(e))
+            return "unknown", FALLBACK_REPLY
+
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            return normalize_category(raw), FALLBACK_REPLY
+
+        complaint_type = normalize_category(str(data.get("category", "")))
+        template = str(data.get("reply") or "").strip()
+        if not template:
+            return complaint_type, FALLBACK_REPLY
+        if self.cache is not None and complaint_type != "unknown" and is_cacheable(template, citizen_name):
+            await self.cache.set(complaint_text, (complaint_type, template), "combined")
+        return complaint_type, personalize(template, citizen_name)
+
+    async def agenerate_reply(self, citizen_name: str, complaint_text: str, complaint_type: str) -> str:
+        """
+        توليد رد بشري طبيعي من نموذج Llama بناءً على نوع الشكوى ونصها.
+        """
+        cached = await self._cached(complaint_text, complaint_type, citizen_name)
+        if cached is not None:
+            return cached
+
+        prompt = self.build_prompt(complaint_text, complaint_type)
+        try:
+            with stage("llm_reply"):
+                template = await self.client.generate(prompt)
+        except (LLMRequestError, httpx.HTTPError) as e:
+            log.warning("reply request failed", error=str(e))
+            return FALLBACK_REPLY
 
-            return reply_text.strip()
+        template = template.strip()
+        if self.cache is not None and template and is_cacheable(template, citizen_name):
+            await self.cache.set(complaint_text, template, complaint_type)
+        return personalize(template, citizen_name)
+
+    async def astream_reply(self, citizen_name: str, complaint_text: str, complaint_type: str) -> AsyncIterator[str]:
+        """
+        مثل agenerate_reply لكن يعيد أجزاء الرد فور وصولها من النموذج.
+        """
+        cached = await self._cached(complaint_text, complaint_type, citizen_name)
+        if cached is not None:
+            yield cached
+            return
+
+        prompt = self.build_prompt(complaint_text, complaint_type)
+        parts = []
+
+        async def tokens():
+            async for token in self.client.stream(prompt):
+                parts.append(token)
+                yield token
+
+        # Timed by hand: a stage span must not stay open across the yields below
+        start = time.perf_counter()
+        try:
+            async for text in personalize_stream(tokens(), citizen_name):
+                yield text
+        except (LLMRequestError, httpx.HTTPError) as e:
+            log.warning("reply request failed", error=str(e))
+            if not parts:
+                yield FALLBACK_REPLY
+            return
+        finally:
+            stage_seconds.observe(time.perf_counter() - start, stage="llm_reply")
+
+        template = "".join(parts).strip()
+        if self.cache is not None and template and is_cacheable(template, citizen_name):
+            await self.cache.set(complaint_text, template, complaint_type)
+
+    def generate_reply(self, citizen_name: str, complaint_text: str, complaint_type: str) -> str:
+        """
+        نسخة متزامنة من agenerate_reply للاستدعاء من خارج حلقة الأحداث.
+        """
+        prompt = self.build_prompt(complaint_text, complaint_type)
+        try:
+            template = self.client.generate_sync(prompt)
+        except (LLMRequestError, httpx.HTTPError) as e:
+            log.warning("reply request failed", error=str(e))
+            return FALLBACK_REPLY
 
-        print(" Llama reply failed:", response.status_code, response.text)
-        return "شكرًا لتواصلك معنا، تم استلام الشكوى وسيتم متابعتها قريبًا."
+        return personalize(template.strip(), citizen_name)
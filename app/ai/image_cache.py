@@ -0,0 +1,271 @@
+"""
+Prediction cache for uploaded complaint images.
+
+The same photo is often uploaded by several witnesses or forwarded again
+and again. Entries are keyed by the SHA-256 of the upload bytes, so an
+exact repeat is answered before the image is decoded or the model runs.
+With IMAGE_CACHE_PHASH=1 a 64-bit difference hash of the decoded image
+also matches re-encoded or resized copies (Hamming distance up to
+IMAGE_CACHE_PHASH_DISTANCE); that check runs after decoding but still
+skips the model.
+
+Entries live in a bounded in-memory LRU and are written through to a
+small SQLite file (IMAGE_CACHE_PATH, "" for memory only) on a dedicated
+thread, so they survive restarts. Rows are tagged with the model they
+came from; rows of any other model are dropped when the cache opens.
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from app.ai.result_cache import cache_requests
+from app.core import metrics
+from app.core.database import sqlite_pragmas
+from app.core.log import get_logger
+
+log = get_logger(__name__)
+
+IMAGE_CACHE_ENABLED = os.getenv("IMAGE_CACHE_ENABLED", "1") == "1"
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "4096"))
+IMAGE_CACHE_PATH = os.getenv("IMAGE_CACHE_PATH", "./image_cache.db")
+# Rows kept on disk; older ones are pruned by last use
+IMAGE_CACHE_MAX_ROWS = int(os.getenv("IMAGE_CACHE_MAX_ROWS", "100000"))
+IMAGE_CACHE_PHASH = os.getenv("IMAGE_CACHE_PHASH", "0") == "1"
+IMAGE_CACHE_PHASH_DISTANCE = int(os.getenv("IMAGE_CACHE_PHASH_DISTANCE", "4"))
+
+CACHE_NAME = "image"
+PRUNE_EVERY = 1000
+
+cache_size = metrics.gauge("image_cache_entries", "Image predictions held in memory")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS image_predictions (
+    sha256 TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    phash INTEGER,
+    label TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS ix_image_predictions_last_used ON image_predictions (last_used)"
+
+
+def image_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def difference_hash(img_array: np.ndarray) -> int:
+    """64-bit dHash of a decoded (H, W, 3) image in [0, 1] or uint8."""
+    pixels = np.asarray(img_array)
+    if pixels.dtype != np.uint8:
+        pixels = np.clip(pixels * 255, 0, 255).astype(np.uint8)
+    gray = np.asarray(Image.fromarray(pixels).convert("L").resize((9, 8), Image.Resampling.BOX), dtype=np.int16)
+    bits = (gray[:, 1:] > gray[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class _Entry:
+    __slots__ = ("label", "confidence", "phash")
+
+    def __init__(self, label: str, confidence: float, phash: Optional[int]):
+        self.label = label
+        self.confidence = confidence
+        self.phash = phash
+
+
+class ImagePredictionCache:
+    """
+    LRU of sha256 -> (label, confidence), written through to SQLite.
+
+    Lookups come in two steps around decoding: `get` (exact bytes, counts
+    hits only) and, on a miss, `get_similar` (perceptual hash, counts the
+    request's final outcome: near_hit or miss).
+    """
+
+    def __init__(
+        self,
+        model_tag: str,
+        max_size: int = IMAGE_CACHE_SIZE,
+        path: str = IMAGE_CACHE_PATH,
+        max_rows: int = IMAGE_CACHE_MAX_ROWS,
+        phash: bool = IMAGE_CACHE_PHASH,
+        phash_distance: int = IMAGE_CACHE_PHASH_DISTANCE,
+    ):
+        self.model_tag = model_tag
+        self.max_size = max_size
+        self.path = path
+        self.max_rows = max_rows
+        self.phash = phash
+        self.phash_distance = phash_distance
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # One thread owns the SQLite connection, which also keeps writes in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-cache") if path else None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded: Optional[asyncio.Task] = None
+        self._stores = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # --- SQLite side (runs on the cache thread) ---
+
+    def _open(self) -> list[tuple]:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        for pragma in sqlite_pragmas():
+            self._conn.execute(pragma)
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+            self._conn.execute(_INDEX)
+            self._conn.execute("DELETE FROM image_predictions WHERE model != ?", (self.model_tag,))
+        return self._conn.execute(
+            "SELECT sha256, phash, label, confidence FROM image_predictions ORDER BY last_used DESC LIMIT ?",
+            (self.max_size,),
+        ).fetchall()
+
+    def _fetch(self, digest: str) -> Optional[tuple]:
+        row = self._conn.execute(
+            "SELECT phash, label, confidence FROM image_predictions WHERE sha256 = ?", (digest,)
+        ).fetchone()
+        if row is not None:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE image_predictions SET last_used = ? WHERE sha256 = ?", (time.time(), digest)
+                )
+        return row
+
+    def _store(self, digest: str, phash: Optional[int], label: str, confidence: float):
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO image_predictions (sha256, model, phash, label, confidence, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, self.model_tag, None if phash is None else _to_signed(phash), label, confidence, time.time()),
+                )
+                self._stores += 1
+                if self._stores % PRUNE_EVERY == 0:
+                    self._conn.execute(
+                        "DELETE FROM image_predictions WHERE sha256 NOT IN "
+                        "(SELECT sha256 FROM image_predictions ORDER BY last_used DESC LIMIT ?)",
+                        (self.max_rows,),
+                    )
+        except sqlite3.Error as e:
+            log.warning("image cache write failed", error=str(e))
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _load(self):
+        try:
+            rows = await self._run(self._open)
+        except sqlite3.Error as e:
+            log.warning("image cache unavailable, keeping it in memory only", path=self.path, error=str(e))
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            return
+        for digest, phash, label, confidence in reversed(rows):
+            self._remember(digest, _Entry(label, confidence, None if phash is None else phash & ((1 << 64) - 1)))
+        log.info("image cache loaded", entries=len(rows), path=self.path)
+
+    async def _ready(self) -> bool:
+        """Whether SQLite is usable; opens it and warms the LRU on first call."""
+        if self._executor is None:
+            return False
+        if self._loaded is None:
+            self._loaded = asyncio.get_running_loop().create_task(self._load())
+        await self._loaded
+        return self._executor is not None
+
+    # --- in-memory LRU ---
+
+    def _remember(self, digest: str, entry: _Entry):
+        self._entries[digest] = entry
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        cache_size.set(len(self._entries))
+
+    def perceptual_hash(self, img_array: np.ndarray) -> Optional[int]:
+        return difference_hash(img_array) if self.phash else None
+
+    async def get(self, digest: str) -> Optional[tuple[str, float]]:
+        """(label, confidence) for exactly these bytes, or None."""
+        entry = self._entries.get(digest)
+        if entry is not None:
+            self._entries.move_to_end(digest)
+        elif await self._ready():
+            if digest in self._entries:  # loaded while we waited
+                entry = self._entries[digest]
+            else:
+                row = await self._run(self._fetch, digest)
+                if row is not None:
+                    phash, label, confidence = row
+                    entry = _Entry(label, confidence, None if phash is None else phash & ((1 << 64) - 1))
+                    self._remember(digest, entry)
+        if entry is None:
+            return None
+        cache_requests.inc(cache=CACHE_NAME, result="hit")
+        return entry.label, entry.confidence
+
+    def get_similar(self, phash: Optional[int]) -> Optional[tuple[str, float]]:
+        """Closest in-memory entry within the Hamming distance, or None."""
+        best, best_distance = None, self.phash_distance + 1
+        if phash is not None:
+            for entry in self._entries.values():
+                if entry.phash is None:
+                    continue
+                distance = (entry.phash ^ phash).bit_count()
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+                    if distance == 0:
+                        break
+
+        cache_requests.inc(cache=CACHE_NAME, result="near_hit" if best else "miss")
+        return (best.label, best.confidence) if best else None
+
+    async def set(self, digest: str, phash: Optional[int], label: str, confidence: float):
+        self._remember(digest, _Entry(label, confidence, phash))
+        if await self._ready():
+            # Written in the background; the cache thread serializes writes
+            asyncio.get_running_loop().run_in_executor(self._executor, self._store, digest, phash, label, confidence)
+
+    def stats(self) -> dict:
+        hits = cache_requests.value(cache=CACHE_NAME, result="hit")
+        near_hits = cache_requests.value(cache=CACHE_NAME, result="near_hit")
+        misses = cache_requests.value(cache=CACHE_NAME, result="miss")
+        total = hits + near_hits + misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "persistent": self._executor is not None,
+            "phash": self.phash,
+            "hits": int(hits),
+            "near_hits": int(near_hits),
+            "misses": int(misses),
+            "hit_rate": (hits + near_hits) / total if total else 0.0,
+        }
+
+    async def aclose(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            # Pending writes run first on the single cache thread
+            await asyncio.get_running_loop().run_in_executor(executor, self._close)
+            executor.shutdown(wait=True)
@@ -1,3 +1,4 @@
+import asyncio
 import tensorflow as tf
 from tensorflow import keras
 import numpy as np
@@ -6,6 +7,12 @@ import io
 from typing import Tuple, Optional
 import os
 
+from app.ai.image_preprocessing import load_image
+
+from app.core.log import get_logger
+
+log = get_logger(__name__)
+
 
 class ImageComplaintClassifier:
     """
@@ -23,16 +30,21 @@ class ImageComplaintClassifier:
         if model_path and os.path.exists(model_path):
             self.load_model(model_path)
         else:
-            print("No pre-trained model found. Using rule-based classification.")
+            log.warning("no pre-trained image model found, using rule-based classification")
             self.model = None
     
     def load_model(self, model_path: str):
-        """Load pre-trained TensorFlow model"""
+        """Load pre-trained TensorFlow model (Keras, or TensorFlow Lite for .tflite files)"""
         try:
-            self.model = keras.models.load_model(model_path)
-            print(f"Image classifier model loaded from {model_path}")
+            if model_path.endswith(".tflite"):
+                from app.ai.tflite_backend import TFLiteModel
+
+                self.model = TFLiteModel(model_path)
+            else:
+                self.model = keras.models.load_model(model_path)
+            log.info("image classifier model loaded", path=model_path)
         except Exception as e:
-            print(f"Failed to load model: {e}")
+            log.error("failed to load image model", path=model_path, error=str(e))
             self.model = None
     
     async def classify_image(self, image_bytes: bytes) -> Tuple[str, float]:
@@ -51,15 +63,12 @@ class ImageComplaintClassifier:
             return self._rule_based_classification(image_bytes)
         
         try:
-            # Preprocess image
-            img = Image.open(io.BytesIO(image_bytes))
-            img = img.convert('RGB')
-            img = img.resize((self.img_height, self.img_width))
-            img_array = np.array(img) / 255.0
+            # Preprocess image (reduced-scale decode, float32) off the event loop
+            img_array = await asyncio.to_thread(load_image, image_bytes, (self.img_width, self.img_height))
             img_array = np.expand_dims(img_array, axis=0)
             
             # Predict
-            predictions = self.model.predict(img_array, verbose=0)
+            predictions = await asyncio.to_thread(self.model.predict, img_array, verbose=0)
             
             # Get class and confidence
             if len(predictions.shape) == 2 and predictions.shape[1] == 1:
@@ -80,7 +89,7 @@ class ImageComplaintClassifier:
             return complaint_type, confidence_score
             
         except Exception as e:
-            print(f"Error classifying image: {e}")
+            log.error("image classification failed", error=str(e))
             return "image_complaint", 0.5
     
     def _rule_based_classification(self, image_bytes: bytes) -> Tuple[str, float]:
@@ -100,7 +109,7 @@ class ImageComplaintClassifier:
             return "image_complaint", 0.7
             
         except Exception as e:
-            print(f"Error in rule-based classification: {e}")
+            log.error("rule-based image classification failed", error=str(e))
             return "unknown", 0.5
     
     def generate_image_description(self, complaint_type: str, confidence: float) -> str:
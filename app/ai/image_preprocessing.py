@@ -0,0 +1,92 @@
+"""
+Shared image decoding and preprocessing for the image classifier.
+
+`load_image` turns encoded bytes (or a path) into a (224, 224, 3) array:
+
+- JPEGs are decoded at reduced scale with PIL's draft mode (1/2, 1/4 or
+  1/8 of full size, never below the target), so a 12 MP phone photo is
+  never expanded to full resolution just to be shrunk again.
+- EXIF orientation is applied, then the image is resized to the model input.
+- Output is float32 in [0, 1] (what the trained model expects) or, with
+  dtype="uint8", raw pixels for models that rescale internally. Never the
+  float64 array that `np.array(img) / 255.0` produces.
+
+`ImagePreprocessor` runs `load_image` in a thread or process pool so large
+uploads do not block the event loop.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional, Union
+
+import numpy as np
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+IMAGE_SIZE = (224, 224)
+IMAGE_DECODE_WORKERS = int(os.getenv("IMAGE_DECODE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# "thread" (PIL releases the GIL while decoding and resizing) or "process"
+IMAGE_DECODE_EXECUTOR = os.getenv("IMAGE_DECODE_EXECUTOR", "thread")
+
+
+class ImageDecodeError(Exception):
+    pass
+
+
+def load_image(
+    source: Union[bytes, str, os.PathLike],
+    size: tuple[int, int] = IMAGE_SIZE,
+    dtype: str = "float32",
+) -> np.ndarray:
+    """Decode `source` (encoded bytes or a file path) into a (H, W, 3) model input."""
+    try:
+        img = Image.open(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+        # JPEG only: pick the smallest DCT scale that is still >= size; no-op for other formats
+        img.draft("RGB", size)
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        if img.size != size:
+            img = img.resize(size, Image.Resampling.BILINEAR, reducing_gap=3.0)
+    except (UnidentifiedImageError, OSError) as e:
+        raise ImageDecodeError(str(e)) from e
+
+    pixels = np.asarray(img, dtype=np.uint8)
+    if dtype == "uint8":
+        return pixels
+    return np.multiply(pixels, np.float32(1 / 255), dtype=np.float32)
+
+
+class ImagePreprocessor:
+    """Runs `load_image` off the event loop in a small shared pool."""
+
+    def __init__(
+        self,
+        size: tuple[int, int] = IMAGE_SIZE,
+        dtype: str = "float32",
+        workers: int = IMAGE_DECODE_WORKERS,
+        executor: str = IMAGE_DECODE_EXECUTOR,
+    ):
+        self.size = size
+        self.dtype = dtype
+        self.workers = workers
+        self.kind = executor
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image-decode")
+        return self._executor
+
+    async def preprocess(self, data: bytes) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), load_image, data, self.size, self.dtype)
+
+    async def aclose(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import os
+import time
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from app.core import metrics
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
+OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "16"))
+
+llm_in_flight = metrics.gauge("llm_requests_in_flight", "LLM requests waiting for a slot or running")
+llm_requests = metrics.counter("llm_requests_total", "LLM requests finished", ["op", "outcome"])
+llm_errors = metrics.counter("llm_errors_total", "Failed LLM requests", ["op", "reason"])
+llm_tokens = metrics.counter("llm_tokens_total", "Tokens reported by Ollama", ["model", "kind"])
+llm_first_token_seconds = metrics.histogram("llm_time_to_first_token_seconds", "Time until the first streamed token")
+
+
+class LLMRequestError(Exception):
+    """Raised when Ollama answers with a non-200 status."""
+
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"Ollama request failed: {status_code} {body}")
+        self.status_code = status_code
+        self.body = body
+
+
+def _parse_line(line: str) -> Optional[dict]:
+    """Decode one Ollama NDJSON line; None for blank or malformed lines."""
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+def _error_reason(error: Exception) -> str:
+    if isinstance(error, LLMRequestError):
+        return f"http_{error.status_code}"
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.ConnectError):
+        return "connect"
+    return type(error).__name__
+
+
+def _count_tokens(model: str, data: dict):
+    """The final (`done`) line of a generation carries Ollama's token counts."""
+    llm_tokens.inc(data.get("prompt_eval_count", 0), model=model, kind="prompt")
+    llm_tokens.inc(data.get("eval_count", 0), model=model, kind="completion")
+
+
+class OllamaClient:
+    """
+    Pooled HTTP client for the Ollama generate API.
+
+    One instance is shared by the classifier and the responder. The async
+    side keeps connections alive between calls and caps the number of
+    in-flight generations; the sync side is kept for scripts and old callers.
+    """
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_URL,
+        model: str = OLLAMA_MODEL,
+        embed_model: str = OLLAMA_EMBED_MODEL,
+        timeout: float = LLM_TIMEOUT,
+        connect_timeout: float = LLM_CONNECT_TIMEOUT,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+    ):
+        self.base_url = base_url
+        self.model = model
+        self.embed_model = embed_model
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sync_client: Optional[httpx.Client] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _timeout(self, timeout: Optional[float]) -> httpx.Timeout:
+        return httpx.Timeout(timeout or self.timeout, connect=self.connect_timeout)
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+
+    def _async_state(self):
+        # Connections and semaphores belong to one event loop
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(timeout=self._timeout(None), limits=self._limits())
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client, self._semaphore
+
+    def _payload(self, prompt: str, **options) -> dict:
+        payload = {"model": self.model, "prompt": prompt}
+        payload.update(options)
+        return payload
+
+    async def stream(self, prompt: str, timeout: Optional[float] = None, **options) -> AsyncIterator[str]:
+        """Yield response tokens as Ollama produces them."""
+        client, semaphore = self._async_state()
+        llm_in_flight.inc()
+        start = time.perf_counter()
+        first = True
+        try:
+            async with semaphore:
+                async with client.stream(
+                    "POST", self.base_url, json=self._payload(prompt, **options), timeout=self._timeout(timeout)
+                ) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        raise LLMRequestError(response.status_code, body.decode("utf-8", "replace"))
+                    async for line in response.aiter_lines():
+                        data = _parse_line(line)
+                        if not data:
+                            continue
+                        if data.get("done"):
+                            _count_tokens(self.model, data)
+                        token = data.get("response")
+                        if token:
+                            if first:
+                                llm_first_token_seconds.observe(time.perf_counter() - start)
+                                first = False
+                            yield token
+        except (LLMRequestError, httpx.HTTPError) as e:
+            llm_requests.inc(op="generate", outcome="error")
+            llm_errors.inc(op="generate", reason=_error_reason(e))
+            raise
+        finally:
+            llm_in_flight.dec()
+        llm_requests.inc(op="generate", outcome="ok")
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None, **options) -> str:
+        """Return the full concatenated completion."""
+        tokens = [token async for token in self.stream(prompt, timeout=timeout, **options)]
+        return "".join(tokens)
+
+    async def embed(self, text: str, timeout: Optional[float] = None) -> list[float]:
+        """Return the embedding vector of `text` from Ollama's embeddings API."""
+        client, semaphore = self._async_state()
+        url = self.base_url.rsplit("/api/", 1)[0] + "/api/embeddings"
+        llm_in_flight.inc()
+        try:
+            async with semaphore:
+                response = await client.post(
+                    url, json={"model": self.embed_model, "prompt": text}, timeout=self._timeout(timeout)
+                )
+            if response.status_code != 200:
+                raise LLMRequestError(response.status_code, response.text)
+        except (LLMRequestError, httpx.HTTPError) as e:
+            llm_requests.inc(op="embed", outcome="error")
+            llm_errors.inc(op="embed", reason=_error_reason(e))
+            raise
+        finally:
+            llm_in_flight.dec()
+        llm_requests.inc(op="embed", outcome="ok")
+        return response.json()["embedding"]
+
+    def generate_sync(self, prompt: str, timeout: Optional[float] = None, **options) -> str:
+        """Blocking variant of `generate` for code running outside the event loop."""
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(timeout=self._timeout(None), limits=self._limits())
+        with self._sync_client.stream(
+            "POST", self.base_url, json=self._payload(prompt, **options), timeout=self._timeout(timeout)
+        ) as response:
+            if response.status_code != 200:
+                raise LLMRequestError(response.status_code, response.read().decode("utf-8", "replace"))
+            tokens = []
+            for line in response.iter_lines():
+                data = _parse_line(line)
+                if not data:
+                    continue
+                if data.get("done"):
+                    _count_tokens(self.model, data)
+                if data.get("response"):
+                    tokens.append(data["response"])
+            return "".join(tokens)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
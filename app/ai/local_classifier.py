@@ -0,0 +1,267 @@
+"""
+In-process complaint classifier that answers before the LLM is asked.
+
+A multinomial Naive Bayes model over word counts, trained from the labelled
+rows of the `complaints` table plus a few seed keywords per category. Retrain
+it offline with:
+
+    python -m app.ai.local_classifier --db smartcity.db
+
+Retraining calibrates the confidence cutoff on held-out data (a hash-based
+slice of the database rows plus the bundled examples in
+training/local_classifier_holdout.jsonl, which are never trained on): the
+lowest cutoff whose held-out precision reaches `--target-precision`. The
+cutoff is saved with the model. Without a trained, calibrated model the
+local tier is skipped and every complaint goes to the LLM.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from typing import Iterable, Tuple
+
+from app.core.log import get_logger
+
+log = get_logger(__name__)
+
+LOCAL_CLASSIFIER_PATH = os.getenv(
+    "LOCAL_CLASSIFIER_PATH", os.path.join("app", "ai", "training", "local_classifier.json")
+)
+LOCAL_CLASSIFIER_HOLDOUT_PATH = os.path.join("app", "ai", "training", "local_classifier_holdout.jsonl")
+# Overrides the cutoff calibrated at training time; unset to use the model's own
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0") or 0) or None
+
+TARGET_PRECISION = 0.9
+MIN_SUPPORT = 10
+HOLDOUT_FRACTION = 0.2
+ALPHA_GRID = (1.0, 0.5, 0.2, 0.1, 0.05)
+
+CATEGORIES = ["neighbor", "noise", "dogs", "cars", "city_services", "robbery", "assault", "utilities"]
+
+# The LLM may answer with a utility sub-type; the local tier folds them in
+CATEGORY_ALIASES = {"internet": "utilities", "electricity": "utilities", "water": "utilities", "phone": "utilities"}
+
+SEED_KEYWORDS = {
+    "neighbor": ["neighbor", "neighbors", "neighbour", "next door", "جار", "الجيران"],
+    "noise": ["noise", "loud", "music", "party", "shouting", "ضوضاء", "إزعاج", "صوت"],
+    "dogs": ["dog", "dogs", "barking", "stray", "كلاب", "كلب", "نباح"],
+    "cars": ["car", "cars", "parking", "parked", "traffic", "speeding", "سيارة", "سيارات", "مرور"],
+    "city_services": ["garbage", "trash", "streetlight", "pothole", "road", "street", "قمامة", "إنارة", "شارع"],
+    "robbery": ["robbery", "robbed", "stolen", "theft", "thief", "سرقة", "سرق", "لص"],
+    "assault": ["assault", "attacked", "hit", "beaten", "fight", "اعتداء", "ضرب", "هجوم"],
+    "utilities": ["internet", "electricity", "power", "water", "phone", "outage", "كهرباء", "ماء", "مياه", "انترنت"],
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def canonical_category(label: str | None) -> str | None:
+    if not label:
+        return None
+    label = label.strip().lower()
+    label = CATEGORY_ALIASES.get(label, label)
+    return label if label in CATEGORIES else None
+
+
+class LocalComplaintClassifier:
+    """Naive Bayes over token counts; `predict` returns (category, confidence)."""
+
+    def __init__(self, alpha: float = 1.0, threshold: float | None = None):
+        self.alpha = alpha
+        # Confidence cutoff calibrated on held-out data; None until calibrated
+        self.threshold = threshold
+        self.doc_counts = {cat: 0 for cat in CATEGORIES}
+        self.token_counts = {cat: Counter() for cat in CATEGORIES}
+        self.vocabulary: set[str] = set()
+
+    # -------------------------
+    # Training
+    # -------------------------
+    def fit(self, samples: Iterable[Tuple[str, str]], with_seeds: bool = True) -> "LocalComplaintClassifier":
+        if with_seeds:
+            for category, keywords in SEED_KEYWORDS.items():
+                self._add(" ".join(keywords), category)
+        for text, label in samples:
+            category = canonical_category(label)
+            if category and text:
+                self._add(text, category)
+        return self
+
+    def _add(self, text: str, category: str):
+        tokens = tokenize(text)
+        self.doc_counts[category] += 1
+        self.token_counts[category].update(tokens)
+        self.vocabulary.update(tokens)
+
+    # -------------------------
+    # Inference
+    # -------------------------
+    def predict(self, text: str) -> Tuple[str, float]:
+        tokens = [t for t in tokenize(text) if t in self.vocabulary]
+        if not tokens:
+            return "unknown", 0.0
+
+        total_docs = sum(self.doc_counts.values())
+        vocab_size = len(self.vocabulary)
+        log_probs = {}
+        for category in CATEGORIES:
+            counts = self.token_counts[category]
+            denominator = math.log(sum(counts.values()) + self.alpha * vocab_size)
+            prior = math.log((self.doc_counts[category] + self.alpha) / (total_docs + self.alpha * len(CATEGORIES)))
+            log_probs[category] = prior + sum(math.log(counts[t] + self.alpha) - denominator for t in tokens)
+
+        best = max(log_probs, key=log_probs.get)
+        # Softmax of the log-likelihoods gives the posterior of the winner
+        norm = sum(math.exp(lp - log_probs[best]) for lp in log_probs.values())
+        return best, 1.0 / norm
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def save(self, path: str = LOCAL_CLASSIFIER_PATH):
+        data = {
+            "alpha": self.alpha,
+            "threshold": self.threshold,
+            "doc_counts": self.doc_counts,
+            "token_counts": {cat: dict(counts) for cat, counts in self.token_counts.items()},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str = LOCAL_CLASSIFIER_PATH) -> "LocalComplaintClassifier | None":
+        """Load the trained model; None (tier skipped) when there is none or it was never calibrated."""
+        if not os.path.exists(path):
+            log.warning("no trained local classifier, skipping the local tier", path=path)
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        model = cls(alpha=data.get("alpha", 1.0), threshold=data.get("threshold"))
+        if model.threshold is None and LOCAL_CLASSIFIER_THRESHOLD is None:
+            log.warning("local classifier has no calibrated threshold, skipping the local tier; retrain it", path=path)
+            return None
+        for category in CATEGORIES:
+            model.doc_counts[category] = data["doc_counts"].get(category, 0)
+            model.token_counts[category] = Counter(data["token_counts"].get(category, {}))
+            model.vocabulary.update(model.token_counts[category])
+        return model
+
+
+def load_labelled_complaints(db_path: str) -> list[Tuple[str, str]]:
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT message, complaint_type FROM complaints WHERE complaint_type IS NOT NULL"
+        ).fetchall()
+    return [(message, label) for message, label in rows if canonical_category(label)]
+
+
+def load_holdout_examples(path: str = LOCAL_CLASSIFIER_HOLDOUT_PATH) -> list[Tuple[str, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["message"], row["complaint_type"]) for row in rows]
+
+
+def split_holdout(samples: list[Tuple[str, str]], fraction: float = HOLDOUT_FRACTION):
+    """Deterministic (train, holdout) split by hash of the normalized text, so duplicates land together."""
+    train, holdout = [], []
+    for text, label in samples:
+        key = " ".join(tokenize(text)).encode("utf-8")
+        bucket = int.from_bytes(hashlib.sha256(key).digest()[:4], "big") / 2**32
+        (holdout if bucket < fraction else train).append((text, label))
+    return train, holdout
+
+
+def calibrate(
+    model: LocalComplaintClassifier,
+    holdout: list[Tuple[str, str]],
+    target_precision: float = TARGET_PRECISION,
+    min_support: int = MIN_SUPPORT,
+) -> dict:
+    """
+    The lowest confidence cutoff at which the held-out answers above it are at
+    least `target_precision` correct (over at least `min_support` of them).
+    `threshold` is None when no cutoff qualifies.
+    """
+    scored = []
+    for text, label in holdout:
+        category, confidence = model.predict(text)
+        scored.append((confidence, category == canonical_category(label)))
+    scored.sort(key=lambda item: item[0], reverse=True)
+
+    best = {"threshold": None, "coverage": 0.0, "precision": None}
+    correct = 0
+    for answered, (confidence, ok) in enumerate(scored, 1):
+        correct += ok
+        precision = correct / answered
+        next_confidence = scored[answered][0] if answered < len(scored) else -1.0
+        # Only cut between distinct confidences: everything at this score is answered
+        if answered >= min_support and precision >= target_precision and next_confidence < confidence:
+            best = {"threshold": confidence, "coverage": answered / len(scored), "precision": precision}
+    return best
+
+
+def train_calibrated(
+    samples: list[Tuple[str, str]],
+    holdout_examples: list[Tuple[str, str]],
+    with_seeds: bool = True,
+    target_precision: float = TARGET_PRECISION,
+    min_support: int = MIN_SUPPORT,
+) -> Tuple[LocalComplaintClassifier, dict]:
+    """Pick alpha and the cutoff on held-out data, then refit on all database rows."""
+    train, holdout = split_holdout(samples)
+    holdout += holdout_examples
+
+    best_alpha, best = ALPHA_GRID[0], None
+    for alpha in ALPHA_GRID:
+        result = calibrate(
+            LocalComplaintClassifier(alpha).fit(train, with_seeds=with_seeds), holdout, target_precision, min_support
+        )
+        if best is None or result["coverage"] > best["coverage"]:
+            best_alpha, best = alpha, result
+
+    model = LocalComplaintClassifier(best_alpha, best["threshold"]).fit(samples, with_seeds=with_seeds)
+    return model, {"alpha": best_alpha, "holdout": len(holdout), **best}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the local complaint pre-classifier")
+    parser.add_argument("--db", default="smartcity.db", help="SQLite database with the complaints table")
+    parser.add_argument("--out", default=LOCAL_CLASSIFIER_PATH)
+    parser.add_argument("--holdout", default=LOCAL_CLASSIFIER_HOLDOUT_PATH, help="extra held-out examples (JSON Lines)")
+    parser.add_argument("--target-precision", type=float, default=TARGET_PRECISION)
+    parser.add_argument("--min-support", type=int, default=MIN_SUPPORT)
+    parser.add_argument("--no-seeds", action="store_true", help="train on database rows only")
+    args = parser.parse_args()
+
+    samples = load_labelled_complaints(args.db)
+    holdout = load_holdout_examples(args.holdout) if args.holdout else []
+    model, report = train_calibrated(
+        samples, holdout, not args.no_seeds, args.target_precision, args.min_support
+    )
+    model.save(args.out)
+
+    per_category = Counter(canonical_category(label) for _, label in samples)
+    print(f"Trained on {len(samples)} labelled complaints: {dict(per_category)}")
+    if report["threshold"] is None:
+        print(
+            f"No cutoff reaches {args.target_precision:.0%} precision on {report['holdout']} held-out complaints; "
+            "the local tier stays off until more labelled data is available (or set LOCAL_CLASSIFIER_THRESHOLD)"
+        )
+    else:
+        print(
+            f"Suggested cutoff {report['threshold']:.3f} (alpha {report['alpha']}): answers "
+            f"{report['coverage']:.0%} of {report['holdout']} held-out complaints at {report['precision']:.0%} precision"
+        )
+    print(f"Saved local classifier to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Sequence
+
+import numpy as np
+
+from app.core import metrics
+from app.core.log import get_logger
+
+log = get_logger(__name__)
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+# Cosine similarity above which a near-duplicate counts as a hit; unset disables embeddings
+RESULT_CACHE_SIMILARITY = float(os.getenv("RESULT_CACHE_SIMILARITY", "0") or 0) or None
+
+cache_requests = metrics.counter(
+    "result_cache_requests_total", "Result cache lookups", ["cache", "result"]
+)
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_SPACES_RE = re.compile(r"\s+")
+
+Embedder = Callable[[str], Awaitable[Sequence[float]]]
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace."""
+    text = _PUNCTUATION_RE.sub(" ", text.lower())
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "embedding", "partition")
+
+    def __init__(self, value, expires_at: float, embedding: Optional[np.ndarray], partition: str = ""):
+        self.value = value
+        self.expires_at = expires_at
+        self.embedding = embedding
+        self.partition = partition
+
+
+class ResultCache:
+    """
+    Bounded LRU + TTL cache keyed by normalized text.
+
+    When an `embedder` and `similarity` threshold are given, a miss on the
+    exact key falls back to the most similar cached entry (cosine similarity
+    over the stored embeddings). Entries can be split into partitions (e.g.
+    one per complaint type); a similar entry only matches within its own.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int = RESULT_CACHE_SIZE,
+        ttl: float = RESULT_CACHE_TTL,
+        embedder: Optional[Embedder] = None,
+        similarity: Optional[float] = RESULT_CACHE_SIMILARITY,
+    ):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.embedder = embedder if similarity else None
+        self.similarity = similarity
+        self._entries: "OrderedDict[tuple[str, str], _Entry]" = OrderedDict()
+        # Embedding computed by the last miss, reused by the `set` that follows it
+        self._last_embedding: tuple[str, Optional[np.ndarray]] = ("", None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def _embed(self, key: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(await self.embedder(key), dtype=np.float32)
+        except Exception as e:
+            log.warning("result cache embedding failed", cache=self.name, error=str(e))
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _lookup_exact(self, key: tuple[str, str], now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _lookup_similar(self, embedding: np.ndarray, partition: str, now: float) -> Optional[_Entry]:
+        best_key, best_score = None, self.similarity
+        for key, entry in self._entries.items():
+            if entry.embedding is None or entry.partition != partition or entry.expires_at < now:
+                continue
+            score = float(np.dot(entry.embedding, embedding))
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key]
+
+    async def get(self, text: str, partition: str = ""):
+        """Return the cached value for `text` in `partition`, or None on a miss."""
+        now = time.monotonic()
+        text_key = normalize_text(text)
+        entry = self._lookup_exact((partition, text_key), now)
+        if entry is None and self.embedder is not None and self._entries:
+            embedding = await self._embed(text_key)
+            self._last_embedding = (text_key, embedding)
+            if embedding is not None:
+                entry = self._lookup_similar(embedding, partition, now)
+
+        cache_requests.inc(cache=self.name, result="hit" if entry else "miss")
+        return entry.value if entry else None
+
+    async def set(self, text: str, value, partition: str = ""):
+        text_key = normalize_text(text)
+        key = (partition, text_key)
+        embedding = None
+        if self.embedder is not None:
+            last_key, embedding = self._last_embedding
+            if last_key != text_key or embedding is None:
+                embedding = await self._embed(text_key)
+        self._entries[key] = _Entry(value, time.monotonic() + self.ttl, embedding, partition)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        hits = cache_requests.value(cache=self.name, result="hit")
+        misses = cache_requests.value(cache=self.name, result="miss")
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": int(hits),
+            "misses": int(misses),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
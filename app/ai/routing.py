@@ -0,0 +1,19 @@
+# Department each complaint category is routed to
+DEPARTMENT_ROUTES = {
+    "dogs": "Animal Control",
+    "noise": "City Council",
+    "cars": "Traffic Dept",
+    "robbery": "Police",
+    "assault": "Police",
+    "utilities": "Utility Services",
+    "city_services": "Municipality",
+    "neighbor": "Neighborhood Committee"
+}
+DEFAULT_DEPARTMENT = "General Support"
+
+# Utility sub-types the classifier may return
+DEPARTMENT_ROUTES.update({sub: "Utility Services" for sub in ("internet", "electricity", "water", "phone")})
+
+
+def route_department(category: str | None) -> str:
+    return DEPARTMENT_ROUTES.get(category or "unknown", DEFAULT_DEPARTMENT)
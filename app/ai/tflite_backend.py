@@ -0,0 +1,74 @@
+"""
+TensorFlow Lite inference for the image classifier.
+
+`TFLiteModel` exposes the same `predict(images, batch_size=..., verbose=...)`
+call as a Keras model, so BatchPredictor and ImageComplaintClassifier can
+use either. It prefers the standalone `tflite_runtime` package (a few MB,
+no TensorFlow import) and falls back to `tf.lite` when only TensorFlow is
+installed. Quantized (int8/uint8) inputs and outputs are converted with the
+tensor's scale and zero point, so callers always pass float32 in [0, 1].
+"""
+import os
+
+import numpy as np
+
+TFLITE_THREADS = int(os.getenv("TFLITE_THREADS", str(os.cpu_count() or 1)))
+
+
+def _interpreter_class():
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    """Not thread-safe: use from one thread at a time (BatchPredictor has a single worker)."""
+
+    def __init__(self, model_path: str, num_threads: int = TFLITE_THREADS):
+        self.model_path = model_path
+        self.interpreter = _interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = int(self._input["shape"][0])
+
+    @property
+    def input_dtype(self):
+        return self._input["dtype"]
+
+    def _resize(self, batch: int):
+        if batch == self._batch:
+            return
+        shape = list(self._input["shape"])
+        shape[0] = batch
+        self.interpreter.resize_tensor_input(self._input["index"], shape)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = batch
+
+    def _quantize(self, images: np.ndarray) -> np.ndarray:
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            return images.astype(np.float32, copy=False)
+        scale, zero_point = self._input["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(images / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, scores: np.ndarray) -> np.ndarray:
+        if self._output["dtype"] == np.float32:
+            return scores
+        scale, zero_point = self._output["quantization"]
+        return (scores.astype(np.float32) - zero_point) * scale
+
+    def predict(self, images: np.ndarray, batch_size: int | None = None, verbose: int = 0) -> np.ndarray:
+        """Class scores for a (N, H, W, C) float batch, like `keras.Model.predict`."""
+        images = np.asarray(images)
+        self._resize(len(images))
+        self.interpreter.set_tensor(self._input["index"], self._quantize(images))
+        self.interpreter.invoke()
+        return self._dequantize(self.interpreter.get_tensor(self._output["index"]))
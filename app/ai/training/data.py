@@ -0,0 +1,61 @@
+"""
+Dataset listing shared by the training, export and evaluation scripts.
+
+The dataset is one folder per class under `dataset/`, images anywhere below
+it. The validation split matches Keras' `flow_from_directory` with
+`validation_split`: per class, files are sorted and the first
+`validation_split` fraction is validation, the rest training.
+"""
+import json
+import os
+
+TRAINING_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(TRAINING_DIR, "dataset")
+LABELS_PATH = os.path.join(TRAINING_DIR, "labels.json")
+SAVED_MODEL_DIR = os.path.join(TRAINING_DIR, "saved_model")
+VALIDATION_SPLIT = 0.2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp", ".tif", ".tiff")
+
+
+def load_class_indices(path: str = LABELS_PATH) -> dict[str, int]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_images(root: str) -> list[str]:
+    """Every image file below `root`, sorted."""
+    found = []
+    for directory, _, files in os.walk(root, followlinks=True):
+        found.extend(os.path.join(directory, name) for name in files if name.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(found)
+
+
+def discover_classes(root: str = DATASET_DIR) -> dict[str, int]:
+    """Class folder name -> index, alphabetical like Keras' `flow_from_directory`."""
+    return {name: i for i, name in enumerate(sorted(
+        entry for entry in os.listdir(root)
+        if os.path.isdir(os.path.join(root, entry)) and not entry.startswith(("_", "."))
+    ))}
+
+
+def list_dataset(
+    root: str = DATASET_DIR,
+    subset: str | None = None,
+    class_indices: dict[str, int] | None = None,
+    validation_split: float = VALIDATION_SPLIT,
+) -> list[tuple[str, int]]:
+    """(path, class index) pairs; `subset` is "training", "validation" or None for all."""
+    if class_indices is None:
+        class_indices = discover_classes(root)
+
+    items = []
+    for name, index in sorted(class_indices.items(), key=lambda item: item[1]):
+        files = list_images(os.path.join(root, name))
+        cut = int(validation_split * len(files))
+        if subset == "validation":
+            files = files[:cut]
+        elif subset == "training":
+            files = files[cut:]
+        items.extend((path, index) for path in files)
+    return items
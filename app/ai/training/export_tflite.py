@@ -0,0 +1,81 @@
+"""
+Export the trained Keras image model to TensorFlow Lite.
+
+    python -m app.ai.training.export_tflite --quantize dynamic
+    python -m app.ai.training.export_tflite --quantize int8 --samples 300
+
+Quantization modes:
+- none:    float32 weights, same numbers as Keras.
+- dynamic: int8 weights, float activations; about 4x smaller, no data needed.
+- int8:    int8 weights and activations, calibrated on a representative
+           sample of the training set (inputs and outputs stay float32).
+
+train.py calls `export_tflite` after training when given `--tflite`.
+"""
+import argparse
+import os
+import random
+
+import numpy as np
+
+from app.ai.image_preprocessing import load_image
+from app.ai.training.data import DATASET_DIR, SAVED_MODEL_DIR, load_class_indices, list_dataset
+
+QUANTIZATION_MODES = ("none", "dynamic", "int8")
+DEFAULT_KERAS_PATH = os.path.join(SAVED_MODEL_DIR, "model.keras")
+
+
+def default_tflite_path(quantize: str) -> str:
+    suffix = "" if quantize == "none" else f"_{quantize}"
+    return os.path.join(SAVED_MODEL_DIR, f"model{suffix}.tflite")
+
+
+def representative_images(dataset_dir: str = DATASET_DIR, samples: int = 200, seed: int = 0):
+    """A random, class-mixed sample of training images, preprocessed like at inference time."""
+    items = list_dataset(dataset_dir, subset="training", class_indices=load_class_indices())
+    random.Random(seed).shuffle(items)
+    for path, _ in items[:samples]:
+        yield load_image(path)
+
+
+def export_tflite(model, out_path: str, quantize: str = "none", dataset_dir: str = DATASET_DIR, samples: int = 200) -> str:
+    import tensorflow as tf
+
+    if quantize not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization {quantize!r}, expected one of {QUANTIZATION_MODES}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize in ("dynamic", "int8"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == "int8":
+        def representative_dataset():
+            for image in representative_images(dataset_dir, samples):
+                yield [np.expand_dims(image, 0)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the Keras image model to TensorFlow Lite")
+    parser.add_argument("--model", default=DEFAULT_KERAS_PATH)
+    parser.add_argument("--quantize", choices=QUANTIZATION_MODES, default="dynamic")
+    parser.add_argument("--out", help="defaults to saved_model/model[_<quantize>].tflite")
+    parser.add_argument("--dataset", default=DATASET_DIR, help="representative images for int8")
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(args.model)
+    out = export_tflite(model, args.out or default_tflite_path(args.quantize), args.quantize, args.dataset, args.samples)
+    print(f"Saved {args.quantize} TFLite model to {out} ({os.path.getsize(out) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
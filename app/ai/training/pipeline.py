@@ -0,0 +1,142 @@
+"""
+Input pipelines for train.py.
+
+- `image_dataset`: tf.data over (path, label) pairs. Images are decoded in
+  parallel with the same `load_image` used at inference time (so training
+  and serving see identical pixels), cached as uint8 after the first epoch,
+  then shuffled, batched, augmented and prefetched.
+- `cached_features`: runs the frozen backbone once over a subset and keeps
+  the pooled embeddings in memory-mapped .npy files, so later epochs (and
+  later runs) only train the head. The cache is rebuilt when the file list,
+  backbone or image size changes.
+- `EpochTimer`: per-epoch wall-clock times for the report.
+"""
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from app.ai.image_preprocessing import IMAGE_SIZE, load_image
+from app.ai.training.data import TRAINING_DIR
+
+CACHE_DIR = os.path.join(TRAINING_DIR, "cache")
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def _decode(path, label, size):
+    def load(p):
+        return load_image(p.decode("utf-8"), size, dtype="uint8")
+
+    image = tf.numpy_function(load, [path], tf.uint8)
+    image.set_shape((size[1], size[0], 3))
+    return image, label
+
+
+def image_dataset(
+    items: list[tuple[str, int]],
+    batch_size: int,
+    training: bool = False,
+    cache: str | None = "",
+    size: tuple[int, int] = IMAGE_SIZE,
+    seed: int = 0,
+) -> tf.data.Dataset:
+    """Batches of float32 images in [0, 1] and integer labels.
+
+    `cache` is a file prefix for tf.data's on-disk cache, "" for an in-memory
+    cache, or None to decode every epoch. Unless `training`, batches keep
+    the order of `items`.
+    """
+    paths = [path for path, _ in items]
+    labels = np.array([label for _, label in items], dtype=np.int32)
+
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+    ds = ds.map(lambda p, y: _decode(p, y, size), num_parallel_calls=AUTOTUNE, deterministic=not training)
+    if cache is not None:
+        # uint8 keeps the cache at a quarter of the float32 size
+        ds = ds.cache(cache)
+    if training:
+        ds = ds.shuffle(min(len(items), 10_000), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    ds = ds.map(lambda x, y: (tf.cast(x, tf.float32) / 255.0, y), num_parallel_calls=AUTOTUNE)
+    if training:
+        augment = tf.keras.Sequential([
+            tf.keras.layers.RandomFlip("horizontal", seed=seed),
+            tf.keras.layers.RandomZoom(0.2, seed=seed),
+        ])
+        ds = ds.map(lambda x, y: (augment(x, training=True), y), num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def dataset_fingerprint(items: list[tuple[str, int]], backbone: str, size: tuple[int, int]) -> str:
+    digest = hashlib.sha256(f"{backbone}:{size}".encode())
+    for path, label in items:
+        stat = os.stat(path)
+        digest.update(f"{path}\0{label}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def cached_features(
+    backbone: tf.keras.Model,
+    items: list[tuple[str, int]],
+    name: str,
+    cache_dir: str = CACHE_DIR,
+    batch_size: int = 64,
+    size: tuple[int, int] = IMAGE_SIZE,
+) -> tuple[np.ndarray, np.ndarray]:
+    """(features, labels) for `items`, as read-only memmaps under `cache_dir`.
+
+    `backbone` must output one pooled vector per image.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    features_path = os.path.join(cache_dir, f"{name}_features.npy")
+    labels_path = os.path.join(cache_dir, f"{name}_labels.npy")
+    meta_path = os.path.join(cache_dir, f"{name}_meta.json")
+    fingerprint = dataset_fingerprint(items, backbone.name, size)
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            fresh = json.load(f).get("fingerprint") == fingerprint
+    except (OSError, ValueError):
+        fresh = False
+
+    if not fresh:
+        start = time.perf_counter()
+        dim = backbone.output_shape[-1]
+        features = np.lib.format.open_memmap(features_path, mode="w+", dtype=np.float32, shape=(len(items), dim))
+        offset = 0
+        for images, _ in image_dataset(items, batch_size, cache=None, size=size):
+            batch = backbone(images, training=False).numpy()
+            features[offset:offset + len(batch)] = batch
+            offset += len(batch)
+        features.flush()
+        del features
+        np.save(labels_path, np.array([label for _, label in items], dtype=np.int32))
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "fingerprint": fingerprint,
+                "images": len(items),
+                "backbone": backbone.name,
+                "seconds": round(time.perf_counter() - start, 2),
+            }, f, indent=2)
+        print(f"Cached {len(items)} {name} embeddings in {time.perf_counter() - start:.1f}s")
+
+    return np.load(features_path, mmap_mode="r"), np.load(labels_path, mmap_mode="r")
+
+
+class EpochTimer(tf.keras.callbacks.Callback):
+    """Collects wall-clock seconds per epoch."""
+
+    def __init__(self):
+        super().__init__()
+        self.seconds: list[float] = []
+        self._start = 0.0
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.seconds.append(round(time.perf_counter() - self._start, 3))
+        print(f"Epoch {epoch + 1} wall time: {self.seconds[-1]:.2f}s")
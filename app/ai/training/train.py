@@ -1,79 +1,153 @@
+"""
+Train the image complaint classifier (EfficientNetB0 backbone, new head).
+
+    python -m app.ai.training.train --mode cached --epochs 10 --tflite dynamic int8
+
+Modes:
+- tfdata: images go through a tf.data pipeline (parallel decode, cache,
+  shuffle, flip/zoom augmentation, prefetch) and the frozen backbone runs
+  on every batch of every epoch.
+- cached: the frozen backbone runs once per image; its pooled embeddings are
+  kept as memory-mapped arrays under training/cache/ and reused by later
+  epochs and later runs, so only the head is trained. No augmentation.
+
+Both save the same model (backbone + head) to saved_model/model.{h5,keras},
+write labels.json and print the wall-clock time of each epoch. Each
+`--tflite` mode also writes a TensorFlow Lite export (see export_tflite.py).
+"""
+import argparse
+import json
+import os
+import time
+
 import tensorflow as tf
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.applications import EfficientNetB0
 from tensorflow.keras import layers, models
-import json
-import os
+
+from app.ai.training.data import (
+    DATASET_DIR,
+    LABELS_PATH,
+    SAVED_MODEL_DIR,
+    VALIDATION_SPLIT,
+    discover_classes,
+    list_dataset,
+)
+from app.ai.training.export_tflite import QUANTIZATION_MODES, default_tflite_path, export_tflite
+from app.ai.training.pipeline import CACHE_DIR, EpochTimer, cached_features, dataset_fingerprint, image_dataset
 
 IMG_SIZE = (224, 224)
 BATCH_SIZE = 16
+EPOCHS = 10
+TRAINING_MODES = ("tfdata", "cached")
 
-# Ensure required folders exist
-os.makedirs("saved_model", exist_ok=True)
 
-# Data augmentation + split
-train_datagen = ImageDataGenerator(
-    rescale=1./255,
-    validation_split=0.2,
-    horizontal_flip=True,
-    zoom_range=0.2,
-)
+def build_model(num_classes: int) -> tuple[tf.keras.Model, tf.keras.Model, tf.keras.Model]:
+    """(full model, frozen backbone producing pooled features, trainable head)."""
+    base_model = EfficientNetB0(
+        include_top=False,
+        weights="imagenet",
+        input_shape=(224,224,3)
+    )
+    base_model.trainable = False
 
-# Training data
-train_data = train_datagen.flow_from_directory(
-    "dataset",                 # لأنك داخل training
-    target_size=IMG_SIZE,
-    batch_size=BATCH_SIZE,
-    subset="training",
-    class_mode="categorical"
-)
+    backbone = models.Sequential([base_model, layers.GlobalAveragePooling2D()], name="backbone")
+    head = models.Sequential([
+        layers.Input((backbone.output_shape[-1],)),
+        layers.Dropout(0.3),
+        layers.Dense(num_classes, activation="softmax")
+    ], name="head")
+    model = models.Sequential([layers.Input((*IMG_SIZE, 3)), backbone, head])
+    return model, backbone, head
 
-# Validation data
-val_data = train_datagen.flow_from_directory(
-    "dataset",                 # نفس الفكرة
-    target_size=IMG_SIZE,
-    batch_size=BATCH_SIZE,
-    subset="validation",
-    class_mode="categorical"
-)
 
-# Save class labels (important for prediction later)
-with open("labels.json", "w", encoding="utf-8") as f:
-    json.dump(train_data.class_indices, f, indent=4, ensure_ascii=False)
+def main():
+    parser = argparse.ArgumentParser(description="Train the image complaint classifier")
+    parser.add_argument("--mode", choices=TRAINING_MODES, default="tfdata")
+    parser.add_argument("--dataset", default=DATASET_DIR)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="decoded images (tfdata) or embeddings (cached)")
+    parser.add_argument("--tflite", nargs="*", choices=QUANTIZATION_MODES, default=[],
+                        help="also export TFLite models with these quantization modes")
+    parser.add_argument("--report", help="write per-epoch timings to this JSON file")
+    args = parser.parse_args()
 
-print("Saved labels.json:", train_data.class_indices)
+    # Ensure required folders exist
+    os.makedirs(SAVED_MODEL_DIR, exist_ok=True)
+    os.makedirs(args.cache_dir, exist_ok=True)
 
-# Load EfficientNetB0
-base_model = EfficientNetB0(
-    include_top=False,
-    weights="imagenet",
-    input_shape=(224,224,3)
-)
-base_model.trainable = False
-
-# Build model
-model = models.Sequential([
-    base_model,
-    layers.GlobalAveragePooling2D(),
-    layers.Dropout(0.3),
-    layers.Dense(train_data.num_classes, activation="softmax")
-])
-
-model.compile(
-    optimizer="adam",
-    loss="categorical_crossentropy",
-    metrics=["accuracy"]
-)
+    class_indices = discover_classes(args.dataset)
+    train_items = list_dataset(args.dataset, "training", class_indices, VALIDATION_SPLIT)
+    val_items = list_dataset(args.dataset, "validation", class_indices, VALIDATION_SPLIT)
+    print(f"{len(train_items)} training and {len(val_items)} validation images in {len(class_indices)} classes")
 
-# Train model
-model.fit(
-    train_data,
-    validation_data=val_data,
-    epochs=10
-)
+    # Save class labels (important for prediction later)
+    with open(LABELS_PATH, "w", encoding="utf-8") as f:
+        json.dump(class_indices, f, indent=4, ensure_ascii=False)
+
+    print("Saved labels.json:", class_indices)
+
+    model, backbone, head = build_model(len(class_indices))
+    timer = EpochTimer()
+    setup_start = time.perf_counter()
+
+    if args.mode == "cached":
+        train_x, train_y = cached_features(backbone, train_items, "training", args.cache_dir)
+        val_x, val_y = cached_features(backbone, val_items, "validation", args.cache_dir)
+        setup_seconds = time.perf_counter() - setup_start
+
+        head.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+        head.fit(
+            train_x, train_y,
+            validation_data=(val_x, val_y),
+            batch_size=args.batch_size,
+            shuffle=True,
+            epochs=args.epochs,
+            callbacks=[timer]
+        )
+    else:
+        # tf.data never checks its cache against the source files, so key it on them
+        def cache_file(name, items):
+            return os.path.join(args.cache_dir, f"{name}-{dataset_fingerprint(items, 'images', IMG_SIZE)[:12]}.tfdata")
+
+        train_data = image_dataset(train_items, args.batch_size, training=True, cache=cache_file("training", train_items))
+        val_data = image_dataset(val_items, args.batch_size, cache=cache_file("validation", val_items))
+        setup_seconds = time.perf_counter() - setup_start
+
+        model.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+        model.fit(
+            train_data,
+            validation_data=val_data,
+            epochs=args.epochs,
+            callbacks=[timer]
+        )
+
+    # Save model (the head trained on cached features is already part of `model`)
+    model.save(os.path.join(SAVED_MODEL_DIR, "model.h5"))
+    model.save(os.path.join(SAVED_MODEL_DIR, "model.keras"))
+
+    print("Model saved in saved_model/model.h5")
+
+    report = {
+        "mode": args.mode,
+        "batch_size": args.batch_size,
+        "train_images": len(train_items),
+        "setup_seconds": round(setup_seconds, 2),
+        "epoch_seconds": timer.seconds,
+        "first_epoch_seconds": timer.seconds[0] if timer.seconds else None,
+        "later_epoch_mean_seconds": (
+            round(sum(timer.seconds[1:]) / len(timer.seconds[1:]), 3) if len(timer.seconds) > 1 else None
+        ),
+    }
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    for quantize in args.tflite:
+        out = export_tflite(model, default_tflite_path(quantize), quantize, args.dataset)
+        print(f"Saved {quantize} TFLite model to {out}")
 
-# Save model
-model.save("saved_model/model.h5")
-model.save("saved_model/model.keras")
 
-print("Model saved in saved_model/model.h5")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from app.ai.audio_stream import SAMPLE_RATE
+from app.core import metrics
+
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "small")
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "2"))
+TRANSCRIBE_QUEUE_SIZE = int(os.getenv("TRANSCRIBE_QUEUE_SIZE", "8"))
+TRANSCRIBE_TIMEOUT = float(os.getenv("TRANSCRIBE_TIMEOUT", "300"))
+
+queue_depth = metrics.gauge("transcription_queue_depth", "Transcription jobs running or waiting")
+job_seconds = metrics.histogram("transcription_job_seconds", "Whisper time per job, inside the worker")
+wait_seconds = metrics.histogram("transcription_wait_seconds", "Time a job waited for a free worker")
+rejected_jobs = metrics.counter("transcription_rejected_total", "Jobs refused or abandoned", ["reason"])
+
+
+class TranscriptionUnavailable(Exception):
+    """The pool cannot take or finish the job right now; retry later."""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TranscriptionQueueFull(TranscriptionUnavailable):
+    status_code = 429
+
+
+class TranscriptionTimeout(TranscriptionUnavailable):
+    status_code = 503
+
+
+# -------------------------
+# Worker process side
+# -------------------------
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads: int):
+    global _worker_model
+    import torch
+    import whisper
+
+    # Split the cores between workers instead of letting each grab all of them
+    torch.set_num_threads(threads)
+    _worker_model = whisper.load_model(model_name)
+
+
+def _transcribe_in_worker(audio: np.ndarray, language: Optional[str]) -> tuple[dict, float]:
+    start = time.perf_counter()
+    result = _worker_model.transcribe(audio, language=language, task="transcribe", temperature=0.0)
+    return result, time.perf_counter() - start
+
+
+# -------------------------
+# Event loop side
+# -------------------------
+class TranscriptionPool:
+    """
+    Whisper transcription in a pool of worker processes, each with its own
+    model. At most `workers + max_queue` jobs are accepted at once; beyond
+    that callers get `TranscriptionQueueFull` with a Retry-After estimate.
+    """
+
+    def __init__(
+        self,
+        model_name: str = WHISPER_MODEL_NAME,
+        workers: int = TRANSCRIBE_WORKERS,
+        max_queue: int = TRANSCRIBE_QUEUE_SIZE,
+        timeout: float = TRANSCRIBE_TIMEOUT,
+    ):
+        self.model_name = model_name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pending = 0
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, threads),
+        )
+
+    def _retry_after(self) -> int:
+        # Time for the jobs ahead to drain, assuming the average job length
+        per_job = job_seconds.mean() or 10.0
+        return max(1, math.ceil(per_job * self._pending / self.workers))
+
+    async def transcribe(self, audio: np.ndarray, language: Optional[str] = "en") -> dict:
+        if self._pending >= self.workers + self.max_queue:
+            rejected_jobs.inc(reason="queue_full")
+            raise TranscriptionQueueFull("Transcription queue is full", self._retry_after())
+
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        job = self._executor.submit(_transcribe_in_worker, audio, language)
+        self._pending += 1
+        queue_depth.set(self._pending)
+        # Released when the worker is done with the job, not when the caller stops waiting:
+        # after a timeout the process keeps running it and still occupies a slot
+        job.add_done_callback(lambda done: loop.is_closed() or loop.call_soon_threadsafe(self._job_finished, done))
+        try:
+            result, worker_time = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+        except asyncio.TimeoutError:
+            # A job already running finishes anyway; one still queued is cancelled
+            rejected_jobs.inc(reason="timeout")
+            raise TranscriptionTimeout("Transcription timed out", self._retry_after())
+
+        wait_seconds.observe(time.perf_counter() - submitted - worker_time)
+        return result
+
+    def _job_finished(self, job):
+        self._pending -= 1
+        queue_depth.set(self._pending)
+        if not job.cancelled() and job.exception() is None:
+            job_seconds.observe(job.result()[1])
+
+    async def warm_up(self):
+        """Start every worker process so each loads its model before real traffic."""
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _transcribe_in_worker, silence, "en")
+            for _ in range(self.workers)
+        ))
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self._pending,
+            "jobs": job_seconds.count(),
+            "mean_job_seconds": job_seconds.mean(),
+            "mean_wait_seconds": wait_seconds.mean(),
+            "rejected_queue_full": int(rejected_jobs.value(reason="queue_full")),
+            "rejected_timeout": int(rejected_jobs.value(reason="timeout")),
+        }
+
+    async def aclose(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
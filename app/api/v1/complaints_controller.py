@@ -1,12 +1,34 @@
 from fastapi import APIRouter, Depends
-from app.models.complaint_dto import ComplaintRequest, ComplaintResponse
-from app.services.complaint_service import ComplaintService
-from app.core.dependencies import get_complaint_service
-from fastapi import APIRouter, UploadFile, File, Form, Depends
+from app.models.complaint_dto import ComplaintFilter, ComplaintPage, ComplaintRequest, ComplaintResponse, ComplaintSearchHit
+from app.services.complaint_service import COMPLAINT_GRAPH_MODE, ComplaintService, node_timings
+from app.core.dependencies import get_complaint_service, get_registry
+from app.core.registry import ModelRegistry
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.ai.audio_stream import AudioDecodeError, AudioTooLongError
+from app.ai.image_preprocessing import ImageDecodeError
+from app.ai.transcription_pool import TranscriptionUnavailable
+from app.core.database import async_session, get_session
+from app.services.bulk_import import BulkImporter, spool_body, spooled_lines
+from app.services.complaint_search import SearchUnavailable, search_complaints
+from app.services.complaint_stats import query_stats
+from app.services.job_runner import JobQueueFull
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from datetime import datetime
+from typing import Literal
+from app.models.complaint_model import Complaint
+import json
 router = APIRouter()
 
+# Upper bound for ?wait= long-polling and for one SSE connection
+MAX_WAIT_SECONDS = 30.0
+
+
+def sse_event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @router.post("/", response_model=ComplaintResponse)
 async def submit_complaint(
     request: ComplaintRequest,
@@ -14,25 +36,213 @@ async def submit_complaint(
 ):
     return await service.handle_complaint(request)
 
+@router.post("/stream")
+async def submit_complaint_streaming(
+    request: ComplaintRequest,
+    service: ComplaintService = Depends(get_complaint_service)
+):
+    """
+    Same as POST / but the reply is sent token by token as server-sent events.
+    Follows COMPLAINT_GRAPH_MODE, so classification, routing and the saved row
+    match POST /; in `combined` and `routed` modes the reply is one token.
+    """
+    async def stream():
+        async for name, data in service.stream_complaint(request):
+            yield sse_event(name, data)
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/bulk")
+async def submit_complaints_bulk(
+    http_request: Request,
+    registry: ModelRegistry = Depends(get_registry)
+):
+    """
+    Body: JSON Lines, one ComplaintRequest per line. Response: NDJSON stream of
+    per-line results and progress records.
+    """
+    importer = BulkImporter(registry)
+    # Read the body now: it is no longer available once the response has started
+    body = await spool_body(http_request.stream())
+
+    async def stream():
+        async for record in importer.run(spooled_lines(body)):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+    # Also closes the spool if the client leaves before the stream starts
+    return StreamingResponse(stream(), media_type="application/x-ndjson", background=BackgroundTask(body.close))
+
 @router.post("/voice", response_model=ComplaintResponse)
 async def create_voice_complaint(
+    response: Response,
     citizen_name: str = Form(...),
     audio_file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db)
+    async_mode: bool = Form(False),
+    service: ComplaintService = Depends(get_complaint_service)
 ):
-    service = ComplaintService(db)
-    return await service.handle_voice_complaint(citizen_name, audio_file)
+    if async_mode:
+        response.status_code = 202
+    try:
+        return await service.handle_voice_complaint(citizen_name, audio_file, async_mode=async_mode)
+    except TranscriptionUnavailable as e:
+        raise HTTPException(
+            status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+        )
+    except AudioTooLongError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Could not decode audio: {e}")
 
 @router.post("/image", response_model=ComplaintResponse)
 async def create_image_complaint(
+    response: Response,
     citizen_name: str = Form(...),
     message: str = Form(None),
     image_file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db)
+    async_mode: bool = Form(False),
+    service: ComplaintService = Depends(get_complaint_service)
 ):
-    service = ComplaintService(db)
-    return await service.handle_image_complaint(
-        citizen_name=citizen_name,
-        message=message,
-        image=image_file
-    )
+    if async_mode:
+        response.status_code = 202
+    try:
+        return await service.handle_image_complaint(
+            citizen_name=citizen_name,
+            message=message,
+            image=image_file,
+            async_mode=async_mode
+        )
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+        )
+    except ImageDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Could not decode image: {e}")
+
+
+@router.get("/classifier/stats")
+async def classifier_stats(registry: ModelRegistry = Depends(get_registry)):
+    return registry.classifier.stats()
+
+
+@router.get("/cache/stats")
+async def result_cache_stats(registry: ModelRegistry = Depends(get_registry)):
+    caches = {"classify": registry.classifier.cache, "reply": registry.responder.cache}
+    return {name: cache.stats() for name, cache in caches.items() if cache is not None}
+
+
+@router.get("/image-cache/stats")
+async def image_cache_stats(registry: ModelRegistry = Depends(get_registry)):
+    cache = registry.image_cache
+    return cache.stats() if cache is not None else {"enabled": False}
+
+
+@router.get("/transcription/stats")
+async def transcription_stats(registry: ModelRegistry = Depends(get_registry)):
+    return registry.transcription_pool.stats()
+
+
+@router.get("/graph/stats")
+async def graph_stats(registry: ModelRegistry = Depends(get_registry)):
+    """Where per-complaint latency goes: wall time per node of the active graph variant."""
+    mode = registry.graph_mode or COMPLAINT_GRAPH_MODE
+    return {"mode": mode, "nodes": node_timings(mode)}
+
+
+@router.get("/write-queue/stats")
+async def write_queue_stats(registry: ModelRegistry = Depends(get_registry)):
+    writer = registry.write_queue
+    return writer.stats() if writer is not None else {"enabled": False}
+
+
+@router.get("/", response_model=ComplaintPage)
+async def list_complaints(
+    filters: ComplaintFilter = Depends(),
+    cursor: int | None = None,
+    limit: int = 50,
+    service: ComplaintService = Depends(get_complaint_service)
+):
+    """Newest first. Pass `next_cursor` from the previous page as `cursor` to continue."""
+    return await service.list_complaints(filters, cursor, limit)
+
+
+@router.get("/export")
+async def export_complaints(
+    filters: ComplaintFilter = Depends(),
+    service: ComplaintService = Depends(get_complaint_service)
+):
+    """All matching complaints as NDJSON, streamed page by page."""
+    async def stream():
+        async for complaint in service.export_complaints(filters):
+            yield complaint.model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.get("/stats")
+async def complaint_stats(
+    bucket: Literal["hour", "day"] = "hour",
+    group_by: Literal["complaint_type", "department"] = "complaint_type",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db: AsyncSession = Depends(get_session)
+):
+    """Complaint counts per hour/day bucket, read from the pre-aggregated rollups."""
+    return await query_stats(db, bucket, group_by, start, end)
+
+
+@router.get("/search", response_model=list[ComplaintSearchHit])
+async def search(
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_session)
+):
+    """Full-text search over messages and replies (English and Arabic); `word*` matches a prefix."""
+    try:
+        return await search_complaints(db, q, limit, offset)
+    except SearchUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+
+# Keep the /{complaint_id} routes last so fixed paths above take precedence
+@router.get("/{complaint_id}", response_model=ComplaintResponse)
+async def get_complaint(
+    complaint_id: int,
+    wait: float = 0,
+    registry: ModelRegistry = Depends(get_registry),
+    service: ComplaintService = Depends(get_complaint_service)
+):
+    """Status of a complaint; `wait` long-polls up to that many seconds for a pending job."""
+    if wait > 0:
+        await registry.job_runner.wait(complaint_id, min(wait, MAX_WAIT_SECONDS))
+    complaint = await service.get_complaint(complaint_id)
+    if complaint is None:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    return ComplaintResponse.from_orm(complaint)
+
+
+@router.get("/{complaint_id}/events")
+async def complaint_events(
+    complaint_id: int,
+    registry: ModelRegistry = Depends(get_registry),
+    service: ComplaintService = Depends(get_complaint_service)
+):
+    """Server-sent events: the current status, then the final one when the job ends."""
+    complaint = await service.get_complaint(complaint_id)
+    if complaint is None:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+
+    def event(complaint) -> str:
+        return sse_event("status", ComplaintResponse.from_orm(complaint).model_dump(mode="json"))
+
+    async def stream():
+        yield event(complaint)
+        if complaint.status in ("pending", "processing"):
+            await registry.job_runner.wait(complaint_id, MAX_WAIT_SECONDS)
+            # The request-scoped session is gone once streaming starts
+            async with async_session() as db:
+                yield event(await db.get(Complaint, complaint_id))
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
@@ -1,9 +1,17 @@
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_session
+from app.core.registry import ModelRegistry, get_model_registry
 from app.services.complaint_service import ComplaintService
 
+
+def get_registry(request: Request) -> ModelRegistry:
+    registry = getattr(request.app.state, "registry", None)
+    return registry or get_model_registry()
+
+
 async def get_complaint_service(
     db: AsyncSession = Depends(get_session),
+    registry: ModelRegistry = Depends(get_registry),
 ) -> ComplaintService:
-    return ComplaintService(db)
+    return ComplaintService(db, registry)
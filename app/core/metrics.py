@@ -0,0 +1,148 @@
+import bisect
+import threading
+from typing import Dict, Iterable, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_metrics: Dict[str, "_Metric"] = {}
+_metrics_lock = threading.Lock()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._values.get(self._key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._values.get(self._key(labels))
+        return series[-1] if series else 0.0
+
+    def mean(self, **labels) -> float:
+        count = self.count(**labels)
+        return self.sum(**labels) / count if count else 0.0
+
+
+def _get_or_create(cls, name, documentation, labelnames=(), **kwargs):
+    with _metrics_lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = cls(name, documentation, labelnames, **kwargs)
+        return metric
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return _get_or_create(Counter, name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return _get_or_create(Gauge, name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+# -------------------------
+# Prometheus text exposition
+# -------------------------
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_prometheus() -> str:
+    """Every registered metric in the Prometheus text format (version 0.0.4)."""
+    with _metrics_lock:
+        registered = sorted(_metrics.values(), key=lambda m: m.name)
+
+    lines = []
+    for metric in registered:
+        lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        with metric._lock:
+            series = {key: list(value) if isinstance(value, list) else value for key, value in metric._values.items()}
+
+        if not isinstance(metric, Histogram):
+            for key, value in sorted(series.items()):
+                lines.append(f"{metric.name}{_format_labels(metric.labelnames, key)} {_format_value(value)}")
+            continue
+
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(metric.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{metric.name}_bucket{_format_labels(metric.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(metric.labelnames, key)
+            lines.append(f"{metric.name}_sum{labels} {_format_value(values[-1])}")
+            lines.append(f"{metric.name}_count{labels} {cumulative}")
+    return "\n".join(lines) + "\n"
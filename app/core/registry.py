@@ -0,0 +1,231 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+from app.ai.batch_inference import BatchPredictor
+from app.ai.complaint_classifier import ComplaintClassifier
+from app.ai.complaint_responder import ComplaintResponder
+from app.ai.image_cache import IMAGE_CACHE_ENABLED, ImagePredictionCache
+from app.ai.image_preprocessing import ImagePreprocessor
+from app.ai.llm_client import OllamaClient
+from app.ai.local_classifier import LocalComplaintClassifier
+from app.ai.result_cache import RESULT_CACHE_ENABLED, ResultCache
+from app.ai.transcription_pool import WHISPER_MODEL_NAME, TranscriptionPool
+from app.services.job_runner import JobRunner
+from app.services.write_behind import WRITE_BEHIND_ENABLED, WriteBehindQueue
+
+IMAGE_MODEL_PATH = os.getenv(
+    "IMAGE_MODEL_PATH", os.path.join("app", "ai", "training", "saved_model", "model.keras")
+)
+# "keras" or "tflite"; the TFLite model comes from export_tflite.py
+IMAGE_BACKEND = os.getenv("IMAGE_BACKEND", "keras")
+IMAGE_TFLITE_PATH = os.getenv(
+    "IMAGE_TFLITE_PATH", os.path.join("app", "ai", "training", "saved_model", "model_dynamic.tflite")
+)
+LABELS_PATH = os.getenv("LABELS_PATH", os.path.join("app", "ai", "training", "labels.json"))
+LOCAL_CLASSIFIER_ENABLED = os.getenv("LOCAL_CLASSIFIER_ENABLED", "1") == "1"
+# Comma-separated resources to load during startup instead of on first use, or "all".
+# The graph is compiled at startup by default; set WARMUP_MODELS="" to defer it too
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "graph")
+WARMUP_ALL = ("graph", "image_model", "labels", "local_classifier", "transcription_pool")
+
+_NOT_LOADED = object()
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the models and clients shared by every request.
+
+    Each resource is loaded the first time it is used and then kept for the
+    lifetime of the worker, so `ComplaintService` only borrows from it. Heavy
+    libraries (TensorFlow, LangGraph, Whisper) are imported by the loaders,
+    so importing the app stays cheap; `warm_up` loads them ahead of traffic.
+    """
+
+    def __init__(
+        self,
+        whisper_model_name: str = WHISPER_MODEL_NAME,
+        image_model_path: str = IMAGE_MODEL_PATH,
+        image_backend: str = IMAGE_BACKEND,
+        image_tflite_path: str = IMAGE_TFLITE_PATH,
+        labels_path: str = LABELS_PATH,
+        graph_mode: str | None = None,
+    ):
+        self.whisper_model_name = whisper_model_name
+        self.image_model_path = image_model_path
+        self.image_backend = image_backend
+        self.image_tflite_path = image_tflite_path
+        self.labels_path = labels_path
+        self.graph_mode = graph_mode
+        self._resources = {}
+        self._lock = threading.RLock()
+
+    def _get_or_load(self, name: str, loader):
+        # A loader may return None for "not available"; that is remembered too
+        resource = self._resources.get(name, _NOT_LOADED)
+        if resource is _NOT_LOADED:
+            with self._lock:
+                resource = self._resources.get(name, _NOT_LOADED)
+                if resource is _NOT_LOADED:
+                    resource = loader()
+                    self._resources[name] = resource
+        return resource
+
+    def register(self, name: str, resource):
+        """Provide a resource up front instead of loading it, e.g. a stub in benchmarks."""
+        self._resources[name] = resource
+
+    @property
+    def transcription_pool(self) -> TranscriptionPool:
+        return self._get_or_load("transcription_pool", lambda: TranscriptionPool(self.whisper_model_name))
+
+    @property
+    def image_model(self):
+        def load_image_model():
+            if self.image_backend == "tflite":
+                from app.ai.tflite_backend import TFLiteModel
+
+                return TFLiteModel(self.image_tflite_path)
+
+            import tensorflow as tf
+
+            return tf.keras.models.load_model(self.image_model_path)
+
+        return self._get_or_load("image_model", load_image_model)
+
+    @property
+    def labels(self) -> dict[int, str]:
+        def load_labels():
+            with open(self.labels_path, "r", encoding="utf-8") as f:
+                return {v: k for k, v in json.load(f).items()}
+
+        return self._get_or_load("labels", load_labels)
+
+    @property
+    def image_preprocessor(self) -> ImagePreprocessor:
+        return self._get_or_load("image_preprocessor", ImagePreprocessor)
+
+    @property
+    def image_predictor(self) -> BatchPredictor:
+        # The model itself is loaded on the predictor's thread, not on the event loop
+        return self._get_or_load(
+            "image_predictor",
+            lambda: BatchPredictor(labels=self.labels, model_loader=lambda: self.image_model),
+        )
+
+    def _image_model_tag(self) -> str:
+        """Identifies the model file, so cached predictions are dropped when it changes."""
+        path = self.image_tflite_path if self.image_backend == "tflite" else self.image_model_path
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return f"{self.image_backend}:{path}"
+        return f"{self.image_backend}:{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    @property
+    def image_cache(self) -> ImagePredictionCache | None:
+        if not IMAGE_CACHE_ENABLED:
+            return None
+        return self._get_or_load("image_cache", lambda: ImagePredictionCache(self._image_model_tag()))
+
+    @property
+    def job_runner(self) -> JobRunner:
+        return self._get_or_load("job_runner", JobRunner)
+
+    @property
+    def write_queue(self) -> WriteBehindQueue | None:
+        if not WRITE_BEHIND_ENABLED:
+            return None
+        return self._get_or_load("write_queue", WriteBehindQueue)
+
+    @property
+    def llm_client(self) -> OllamaClient:
+        return self._get_or_load("llm_client", OllamaClient)
+
+    @property
+    def local_classifier(self) -> LocalComplaintClassifier | None:
+        if not LOCAL_CLASSIFIER_ENABLED:
+            return None
+        return self._get_or_load("local_classifier", LocalComplaintClassifier.load)
+
+    def _result_cache(self, name: str) -> ResultCache | None:
+        if not RESULT_CACHE_ENABLED:
+            return None
+        return self._get_or_load(
+            f"{name}_cache", lambda: ResultCache(name, embedder=self.llm_client.embed)
+        )
+
+    @property
+    def classifier(self) -> ComplaintClassifier:
+        return self._get_or_load(
+            "classifier",
+            lambda: ComplaintClassifier(
+                client=self.llm_client, local=self.local_classifier, cache=self._result_cache("classify")
+            ),
+        )
+
+    @property
+    def responder(self) -> ComplaintResponder:
+        return self._get_or_load(
+            "responder",
+            lambda: ComplaintResponder(client=self.llm_client, cache=self._result_cache("reply")),
+        )
+
+    def compiled_graph(self, mode: str | None = None, persist: bool = True):
+        """The complaint pipeline for `mode` (default: COMPLAINT_GRAPH_MODE), compiled once."""
+        # Imported here because the service module imports the registry
+        from app.services.complaint_service import COMPLAINT_GRAPH_MODE, ComplaintPipeline
+
+        mode = mode or self.graph_mode or COMPLAINT_GRAPH_MODE
+        return self._get_or_load(
+            f"graph:{mode}" if persist else f"analysis_graph:{mode}",
+            lambda: ComplaintPipeline(self.classifier, self.responder, self.write_queue).build_graph(mode, persist),
+        )
+
+    @property
+    def graph(self):
+        return self.compiled_graph()
+
+    @property
+    def analysis_graph(self):
+        """The same pipeline without the save step, for callers that batch their writes."""
+        return self.compiled_graph(persist=False)
+
+    async def warm_up(self, names: str | list[str] = WARMUP_MODELS) -> dict[str, float]:
+        """Load the given resources in a worker thread; returns seconds spent per resource."""
+        if isinstance(names, str):
+            names = list(WARMUP_ALL) if names == "all" else [n.strip() for n in names.split(",") if n.strip()]
+
+        timings = {}
+        for name in names:
+            start = time.perf_counter()
+            resource = await asyncio.to_thread(getattr, self, name)
+            if name == "transcription_pool":
+                await resource.warm_up()
+            timings[name] = round(time.perf_counter() - start, 3)
+        return timings
+
+    async def aclose(self):
+        # Background jobs first: they may still need the models below and the
+        # write queue, which then drains before the database goes away
+        for name in (
+            "job_runner", "write_queue", "transcription_pool",
+            "image_preprocessor", "image_predictor", "image_cache", "llm_client",
+        ):
+            resource = self._resources.get(name)
+            if resource is not None:
+                await resource.aclose()
+        self._resources.clear()
+
+
+_registry: ModelRegistry | None = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the registry of the current worker process, creating it if needed."""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,152 @@
+"""
+Per-stage timings and optional trace spans.
+
+`stage("llm_reply")` times a block into `complaint_stage_seconds{stage}` and,
+when TRACE_EXPORT_PATH is set, also records it as a span. Spans nest through
+a context variable, so the stages of one request share its trace id. They
+are written as OTLP/JSON lines (one `resourceSpans` export per line), which
+the OpenTelemetry Collector's `otlpjsonfile` receiver and most trace viewers
+can read.
+"""
+import atexit
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from app.core import metrics
+
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "smart-city-complaints")
+TRACE_FLUSH_EVERY = int(os.getenv("TRACE_FLUSH_EVERY", "64"))
+
+stage_seconds = metrics.histogram(
+    "complaint_stage_seconds", "Wall time of pipeline stages (transcription, inference, LLM, DB)", ["stage"]
+)
+stage_errors = metrics.counter("complaint_stage_errors_total", "Pipeline stages that raised", ["stage"])
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else ""
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class SpanExporter:
+    """Buffers finished spans and appends them to a JSON Lines file."""
+
+    def __init__(self, path: str, service_name: str = TRACE_SERVICE_NAME, flush_every: int = TRACE_FLUSH_EVERY):
+        self.path = path
+        self.service_name = service_name
+        self.flush_every = flush_every
+        self._buffer: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.append(span)
+            if len(self._buffer) < self.flush_every:
+                return
+            spans, self._buffer = self._buffer, []
+        self._write(spans)
+
+    def flush(self):
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if spans:
+            self._write(spans)
+
+    def _write(self, spans: list[Span]):
+        record = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "app"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+exporter: Optional[SpanExporter] = SpanExporter(TRACE_EXPORT_PATH) if TRACE_EXPORT_PATH else None
+if exporter is not None:
+    atexit.register(exporter.flush)
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a span around the block when tracing is enabled; yields the span or None."""
+    if exporter is None:
+        yield None
+        return
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        exporter.export(current)
+
+
+@contextmanager
+def stage(name: str, **attributes):
+    """Time a pipeline stage into complaint_stage_seconds{stage} and trace it as a span."""
+    start = time.perf_counter()
+    try:
+        with span(name, **attributes) as current:
+            yield current
+    except Exception:
+        stage_errors.inc(stage=name)
+        raise
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage=name)
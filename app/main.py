@@ -1,23 +1,52 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
-from app.core.database import engine, Base
+from app.core import metrics, tracing
+from app.core.log import configure_logging, get_logger
+from app.core.database import engine, Base, upgrade_schema
+from app.core.registry import WARMUP_MODELS, get_model_registry
+from app.services.complaint_search import ensure_search_index
+from app.services.job_runner import JOB_FAIL_ABANDONED
 from app.api.v1.complaints_controller import router as complaints_router
 
-import logging
+configure_logging()
+log = get_logger(__name__)
+
+http_request_seconds = metrics.histogram(
+    "http_request_seconds", "Time to response headers, per endpoint", ["method", "route", "status"]
+)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    print("✅ Database tables created successfully.")
+        await conn.run_sync(upgrade_schema)
+        await conn.run_sync(ensure_search_index)
+    log.info("database tables ready")
+
+    # One model registry per worker; models load on first use
+    app.state.registry = get_model_registry()
+    if JOB_FAIL_ABANDONED:
+        abandoned = await app.state.registry.job_runner.fail_abandoned()
+        if abandoned:
+            log.warning("marked unfinished jobs from the previous run as failed", complaints=abandoned)
+    if WARMUP_MODELS:
+        timings = await app.state.registry.warm_up(WARMUP_MODELS)
+        log.info("models warmed up", **timings)
 
     yield  # Application runs here
 
     # Shutdown
+    await app.state.registry.aclose()
     await engine.dispose()
-    print("Database connection closed.")
+    if tracing.exporter is not None:
+        tracing.exporter.flush()
+    log.info("database connection closed")
 
 
 app = FastAPI(
@@ -37,12 +66,32 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    with tracing.span(f"{request.method} {request.url.path}") as current:
+        response = await call_next(request)
+    # The route template (/api/v1/complaints/{complaint_id}) keeps label cardinality bounded
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    http_request_seconds.observe(
+        time.perf_counter() - start, method=request.method, route=route, status=response.status_code
+    )
+    if current is not None:
+        current.name = f"{request.method} {route}"
+        current.set(**{"http.status_code": response.status_code})
+    return response
+
+
 # Routers
 app.include_router(complaints_router, prefix="/api/v1/complaints", tags=["Complaints"])
 
 
 @app.get("/")
 async def root():
-    print("Smart City API is running")
     return {"message": "Smart City API is running"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
  
\ No newline at end of file
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from datetime import datetime
 
 class ComplaintRequest(BaseModel):
     citizen_name: str
@@ -13,6 +14,34 @@ class ComplaintResponse(BaseModel):
     complaint_type: Optional[str]
     reply: Optional[str]
     action_taken: Optional[str]
+    department: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes  = True
+
+
+class ComplaintFilter(BaseModel):
+    complaint_type: Optional[str] = None
+    action_taken: Optional[str] = None
+    citizen_name: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+
+class ComplaintPage(BaseModel):
+    items: list[ComplaintResponse]
+    # Pass back as `cursor` to get the next (older) page; None on the last page
+    next_cursor: Optional[int] = None
+
+
+class ComplaintSearchHit(BaseModel):
+    id: int
+    citizen_name: str
+    complaint_type: Optional[str]
+    created_at: Optional[datetime] = None
+    message_snippet: str
+    reply_snippet: Optional[str] = None
+    # bm25 score; lower is a better match
+    rank: float
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.ai.routing import route_department
 
 class Complaint(Base):
     __tablename__ = "complaints"
@@ -12,3 +13,21 @@ class Complaint(Base):
     action_taken = Column(String(100), nullable=True)
     reply = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # pending -> processing -> done | failed (async job mode); sync requests are saved as done
+    status = Column(String(20), nullable=False, default="done", server_default="done")
+
+    @property
+    def department(self) -> str:
+        """Department the complaint is routed to, derived from its type."""
+        return route_department(self.complaint_type)
+
+    # Composite indexes for the keyset-paginated list API: each filter column
+    # is paired with id so "WHERE col = ? AND id < ? ORDER BY id DESC" is a range scan
+    __table_args__ = (
+        Index("ix_complaints_type_id", "complaint_type", "id"),
+        Index("ix_complaints_action_id", "action_taken", "id"),
+        Index("ix_complaints_citizen_id", "citizen_name", "id"),
+        Index("ix_complaints_created_id", "created_at", "id"),
+    )
+    # Read server defaults (created_at) back through RETURNING on the INSERT itself
+    __mapper_args__ = {"eager_defaults": True}
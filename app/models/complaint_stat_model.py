@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from app.core.database import Base
+
+class ComplaintStat(Base):
+    """
+    Pre-aggregated complaint counts per time bucket, kept up to date in the
+    same transaction that saves each complaint.
+    """
+    __tablename__ = "complaint_stats"
+
+    id = Column(Integer, primary_key=True)
+    bucket = Column(String(10), nullable=False)  # "hour" or "day"
+    bucket_start = Column(DateTime, nullable=False)
+    complaint_type = Column(String(50), nullable=False)
+    department = Column(String(100), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("bucket", "bucket_start", "complaint_type", "department", name="uq_complaint_stats_key"),
+    )
@@ -0,0 +1,233 @@
+"""
+Bulk ingestion of complaints from JSON Lines (one ComplaintRequest per line).
+
+Complaints are analysed by the pipeline with bounded parallelism and written
+in chunked multi-row inserts, one transaction per chunk. Results stream out
+as they are produced: one `item` record per input line and a `progress`
+record after every chunk.
+
+    python -m app.services.bulk_import complaints.jsonl > results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import IO, AsyncIterable, AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+
+from app.core.database import Base, async_session, engine, upgrade_schema
+from app.core.registry import ModelRegistry, get_model_registry
+from app.models.complaint_dto import ComplaintRequest
+from app.services.complaint_search import ensure_search_index
+from app.services.complaint_stats import record_complaints
+from app.models.complaint_model import Complaint
+
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+# Uploaded bodies above this size are spooled to a temporary file instead of memory
+BULK_SPOOL_MAX_BYTES = int(os.getenv("BULK_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+
+async def spool_body(chunks: AsyncIterable[bytes], max_memory: int = BULK_SPOOL_MAX_BYTES) -> IO[bytes]:
+    """
+    Read a whole request body into a temporary file, rewound for reading.
+
+    The body has to be consumed before a streaming response starts: once it
+    has, Starlette no longer delivers the request body.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        async for chunk in chunks:
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+async def spooled_lines(spool: IO[bytes]) -> AsyncIterator[str]:
+    """Decoded lines of a spooled body; closes it when done."""
+    try:
+        for line in spool:
+            yield line.decode("utf-8")
+    finally:
+        spool.close()
+
+
+class BulkImporter:
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        session_factory=async_session,
+        concurrency: int = BULK_CONCURRENCY,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ):
+        self.registry = registry
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+
+    async def run(self, lines: AsyncIterable[str]) -> AsyncIterator[dict]:
+        # Both queues are bounded so a huge input never sits in memory at once
+        todo: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        analysed: asyncio.Queue = asyncio.Queue(maxsize=self.chunk_size)
+
+        async def produce():
+            line_no = 0
+            try:
+                async for line in lines:
+                    line_no += 1
+                    if line.strip():
+                        await todo.put((line_no, line))
+            except (UnicodeDecodeError, OSError) as e:
+                # Stop reading but still save what was analysed so far
+                await analysed.put(
+                    {"event": "item", "line": line_no + 1, "status": "error", "error": f"unreadable input: {e}"}
+                )
+            for _ in range(self.concurrency):
+                await todo.put(None)
+
+        async def work():
+            while (item := await todo.get()) is not None:
+                await analysed.put(await self._analyse(*item))
+
+        async def supervise():
+            workers = [asyncio.create_task(work()) for _ in range(self.concurrency)]
+            try:
+                await produce()
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+            await analysed.put(None)
+
+        supervisor = asyncio.create_task(supervise())
+        counts = {"processed": 0, "saved": 0, "failed": 0}
+        chunk = []
+        try:
+            while (result := await analysed.get()) is not None:
+                counts["processed"] += 1
+                if result["status"] == "error":
+                    counts["failed"] += 1
+                    yield result
+                    continue
+                chunk.append(result)
+                if len(chunk) >= self.chunk_size:
+                    async for record in self._flush(chunk, counts):
+                        yield record
+                    chunk = []
+                    yield {"event": "progress", **counts}
+
+            if chunk:
+                async for record in self._flush(chunk, counts):
+                    yield record
+            yield {"event": "progress", "done": True, **counts}
+        finally:
+            supervisor.cancel()
+
+    async def _analyse(self, line_no: int, line: str) -> dict:
+        try:
+            request = ComplaintRequest.model_validate_json(line)
+        except ValidationError as e:
+            return {"event": "item", "line": line_no, "status": "error", "error": e.errors()[0]["msg"]}
+
+        state = {
+            "citizen_name": request.citizen_name,
+            "message": request.message,
+            "complaint_type": "",
+            "provisional_type": request.complaint_type or "",
+            "reply": "",
+            "action_taken": "",
+            "db": None,
+            "complaint_id": None,
+            "saved_complaint": None,
+        }
+        try:
+            state = await self.registry.analysis_graph.ainvoke(state)
+        except Exception as e:
+            return {"event": "item", "line": line_no, "status": "error", "error": str(e)}
+
+        return {
+            "event": "item",
+            "line": line_no,
+            "status": "analysed",
+            "row": {
+                "citizen_name": state["citizen_name"],
+                "message": state["message"],
+                "complaint_type": state["complaint_type"],
+                "reply": state["reply"],
+                "action_taken": state["action_taken"],
+                "status": "done",
+            },
+        }
+
+    async def _flush(self, chunk: list[dict], counts: dict) -> AsyncIterator[dict]:
+        rows = [result["row"] for result in chunk]
+        try:
+            async with self.session_factory() as db:
+                inserted = await db.execute(
+                    insert(Complaint).returning(Complaint.id, Complaint.created_at, sort_by_parameter_order=True),
+                    rows,
+                )
+                saved = inserted.all()
+                ids = [complaint_id for complaint_id, _ in saved]
+                await record_complaints(
+                    db, [(row["complaint_type"], created_at) for row, (_, created_at) in zip(rows, saved)]
+                )
+                await db.commit()
+        except Exception as e:
+            counts["failed"] += len(chunk)
+            for result in chunk:
+                yield {"event": "item", "line": result["line"], "status": "error", "error": f"insert failed: {e}"}
+            return
+
+        counts["saved"] += len(chunk)
+        for result, complaint_id in zip(chunk, ids):
+            row = result["row"]
+            yield {
+                "event": "item",
+                "line": result["line"],
+                "status": "saved",
+                "id": complaint_id,
+                "complaint_type": row["complaint_type"],
+            }
+
+
+async def _file_lines(path: str) -> AsyncIterator[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield line
+
+
+async def _main(args):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+        await conn.run_sync(ensure_search_index)
+
+    registry = get_model_registry()
+    importer = BulkImporter(registry, concurrency=args.concurrency, chunk_size=args.chunk_size)
+    try:
+        async for record in importer.run(_file_lines(args.path)):
+            stream = sys.stderr if record["event"] == "progress" else sys.stdout
+            print(json.dumps(record, ensure_ascii=False), file=stream, flush=True)
+    finally:
+        await registry.aclose()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import complaints from a JSON Lines file")
+    parser.add_argument("path", help="file with one ComplaintRequest JSON object per line")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY)
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
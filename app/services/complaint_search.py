@@ -0,0 +1,175 @@
+"""
+Full-text search over complaint messages and replies (SQLite FTS5).
+
+`complaints_fts` is an external-content FTS5 index over complaints.message
+and complaints.reply, kept in sync by triggers. unicode61 folds Latin
+accents; Arabic text is folded in SQL before indexing (harakat and tatweel
+dropped, hamza-carrying alef forms mapped to bare alef) and queries get the
+same folding, so "الكَهرباء" and "الكهرباء" match each other. Rebuild the
+index from the table with:
+
+    python -m app.services.complaint_search --rebuild
+"""
+import argparse
+import asyncio
+import re
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import Base, async_session, engine, upgrade_schema
+
+FTS_TABLE = "complaints_fts"
+MAX_SEARCH_RESULTS = 100
+
+# Arabic folding shared by the triggers and the query side
+ARABIC_FOLDING = {
+    **{chr(code): "" for code in range(0x064B, 0x0653)},  # tanween, harakat, shadda, sukun
+    "\u0670": "",  # superscript alef
+    "\u0640": "",  # tatweel
+    "أ": "ا", "إ": "ا", "آ": "ا",
+}
+_FOLD_TABLE = str.maketrans(ARABIC_FOLDING)
+
+
+def fold_arabic(value: str) -> str:
+    return value.translate(_FOLD_TABLE)
+
+
+def _fold_sql(column: str) -> str:
+    expr = column
+    for source, target in ARABIC_FOLDING.items():
+        expr = f"replace({expr}, '{source}', '{target}')"
+    return expr
+
+
+def _index_values(prefix: str) -> str:
+    return f"{_fold_sql(prefix + 'message')}, {_fold_sql(prefix + 'reply')}"
+
+
+_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        message, reply,
+        content='complaints', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2 categories 'L* N* Co Mn'",
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS complaints_fts_insert AFTER INSERT ON complaints BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, message, reply) VALUES (new.id, {_index_values("new.")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS complaints_fts_delete AFTER DELETE ON complaints BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, message, reply) VALUES ('delete', old.id, {_index_values("old.")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS complaints_fts_update AFTER UPDATE OF message, reply ON complaints BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, message, reply) VALUES ('delete', old.id, {_index_values("old.")});
+        INSERT INTO {FTS_TABLE}(rowid, message, reply) VALUES (new.id, {_index_values("new.")});
+    END
+    """,
+]
+
+# FTS5's own 'rebuild' would index the raw text, so re-insert folded values instead
+_REBUILD_SQL = [
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')",
+    f"INSERT INTO {FTS_TABLE}(rowid, message, reply) SELECT id, {_index_values('')} FROM complaints",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')",
+]
+
+_SEARCH_SQL = text(f"""
+    SELECT c.id, c.citizen_name, c.complaint_type, c.created_at,
+           snippet({FTS_TABLE}, 0, '[', ']', '…', 12) AS message_snippet,
+           snippet({FTS_TABLE}, 1, '[', ']', '…', 12) AS reply_snippet,
+           bm25({FTS_TABLE}) AS rank
+    FROM {FTS_TABLE}
+    JOIN complaints c ON c.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH :query
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+""")
+
+_TERM_RE = re.compile(r"\w+\*?")
+
+
+class SearchUnavailable(Exception):
+    """The configured database has no FTS5 index (non-SQLite backend)."""
+
+
+def ensure_search_index(sync_conn) -> bool:
+    """
+    Create the FTS table and its triggers if missing, filling the index when
+    the table is new. Run through `conn.run_sync`; no-op on other databases.
+    """
+    if sync_conn.dialect.name != "sqlite":
+        return False
+    exists = sync_conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).first()
+    for ddl in _FTS_DDL:
+        sync_conn.exec_driver_sql(ddl)
+    if not exists:
+        for statement in _REBUILD_SQL:
+            sync_conn.exec_driver_sql(statement)
+    return True
+
+
+def to_fts_query(user_query: str) -> str:
+    """
+    Turn free text into a safe FTS5 query: every word must match, a trailing
+    `*` keeps prefix matching, and FTS operators in the input are ignored.
+    """
+    terms = []
+    for term in _TERM_RE.findall(fold_arabic(user_query)):
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        if term:
+            terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    return " ".join(terms)
+
+
+async def search_complaints(db: AsyncSession, user_query: str, limit: int = 20, offset: int = 0) -> list[dict]:
+    """Best matches first (bm25); snippets mark matched words with [brackets]."""
+    if db.get_bind().dialect.name != "sqlite":
+        raise SearchUnavailable("Full-text search needs the SQLite FTS5 index")
+    query = to_fts_query(user_query)
+    if not query:
+        return []
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+    result = await db.execute(_SEARCH_SQL, {"query": query, "limit": limit, "offset": max(0, offset)})
+    return [dict(row._mapping) for row in result]
+
+
+async def rebuild_search_index(db: AsyncSession):
+    for statement in _REBUILD_SQL:
+        await db.execute(text(statement))
+    await db.commit()
+
+
+async def _main():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+        await conn.run_sync(ensure_search_index)
+    async with async_session() as db:
+        await rebuild_search_index(db)
+    await engine.dispose()
+    print("Rebuilt complaint full-text index")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the complaint full-text index")
+    parser.add_argument("--rebuild", action="store_true", help="re-index every complaint from the table")
+    args = parser.parse_args()
+    if args.rebuild:
+        asyncio.run(_main())
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
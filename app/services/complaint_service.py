@@ -1,20 +1,24 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.complaint_model import Complaint
 from app.ai.complaint_responder import ComplaintResponder
-from app.models.complaint_dto import ComplaintRequest, ComplaintResponse
+from app.models.complaint_dto import ComplaintFilter, ComplaintPage, ComplaintRequest, ComplaintResponse
 from app.ai.complaint_classifier import ComplaintClassifier
-from langgraph.graph import StateGraph, START, END
-from typing import TypedDict, Optional
-import asyncio
-import tempfile
+from app.core.registry import ModelRegistry, get_model_registry
+from app.ai.audio_stream import SAMPLE_RATE, decode_upload
+from app.ai.image_cache import image_digest
+from app.core.database import async_session
+from app.services.write_behind import WriteBehindQueue, save_complaint
+from app.ai.routing import route_department
+from app.core import metrics
+from app.core.log import get_logger
+from app.core.tracing import span, stage
+from typing import AsyncIterator, TypedDict, Optional
+from sqlalchemy import select
+from contextlib import nullcontext
 import os
-import whisper
+import time
 import numpy as np
-from PIL import Image
-import tensorflow as tf
-import json
 from fastapi import UploadFile
-from io import BytesIO
 
 
 
@@ -27,167 +31,507 @@ class ComplaintState(TypedDict):
     citizen_name: str
     message: str
     complaint_type: str
+    provisional_type: str
     reply: str
     action_taken: str
+    department: str
     db: AsyncSession
+    complaint_id: int | None
     saved_complaint: Complaint | None
 
 
-# =========================
-#   Whisper global model
-# =========================
-WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "small")
-_whisper_model = whisper.load_model(WHISPER_MODEL_NAME)
+# Every variant routes the classified complaint to a department (decide_action)
+# sequential:  classify -> decide_action -> reply -> save (two LLM round trips back to back)
+# speculative: classify -> decide_action and reply run concurrently, reconciled before save
+# combined:    one structured LLM call returns category and reply together
+# routed:      classify -> decide_action -> templated routing notice, no reply LLM call
+GRAPH_NODES = {
+    "sequential": ("classify", "decide_action", "reply", "save"),
+    "speculative": ("classify", "decide_action", "reply", "reconcile", "save"),
+    "combined": ("classify_reply", "decide_action", "save"),
+    "routed": ("classify", "decide_action", "routing_notice", "save"),
+}
+GRAPH_MODES = tuple(GRAPH_NODES)
+COMPLAINT_GRAPH_MODE = os.getenv("COMPLAINT_GRAPH_MODE", "sequential")
+
+log = get_logger(__name__)
+
+node_seconds = metrics.histogram("complaint_graph_node_seconds", "Wall time per pipeline node", ["mode", "node"])
+
+# A speculative reply written for the wrong category is only regenerated
+# for these, where the wording of the reply really matters
+RECONCILE_CATEGORIES = {"robbery", "assault"}
 
 
 # =========================
-#   Complaint Service
+#   Complaint Pipeline
 # =========================
-class ComplaintService:
-    def __init__(self, db: AsyncSession):
-        self.db = db
-        self.classifier = ComplaintClassifier()
-        self.responder = ComplaintResponder()
-        self.graph = self._build_graph()
-        self.transcriber = whisper.load_model("base")  # load local Whisper model
-        
-        # ⬅  model.keras
-        model_path = os.path.join("app", "ai", "training", "saved_model", "model.keras")
-        self.image_model = tf.keras.models.load_model(model_path)
-
-        # ⬅  labels.json
-        labels_path = os.path.join("app", "ai", "training", "labels.json")
-        with open(labels_path, "r") as f:
-            self.labels = {v: k for k, v in json.load(f).items()}
+class ComplaintPipeline:
+    """
+    LangGraph nodes shared by all requests. The per-request database session
+    travels in the state, so the compiled graph can be reused by every worker
+    coroutine. Nodes return only the keys they change so that branches of the
+    speculative graph can run in parallel.
+    """
+
+    def __init__(
+        self,
+        classifier: ComplaintClassifier,
+        responder: ComplaintResponder,
+        writer: WriteBehindQueue | None = None,
+    ):
+        self.classifier = classifier
+        self.responder = responder
+        self.writer = writer
 
     # -------------------------
     # Step 1: classify complaint
     # -------------------------
-    async def _classify_node(self, state: ComplaintState) -> ComplaintState:
-        complaint_type = self.classifier.classify_complaint(state["message"])
-        state["complaint_type"] = complaint_type
-        return state
+    async def _classify_node(self, state: ComplaintState) -> dict:
+        complaint_type = await self.classifier.aclassify_complaint(state["message"])
+        return {"complaint_type": complaint_type}
 
        # Step 2: توليد رد بشري طبيعي
-    async def _reply_node(self, state: ComplaintState) -> ComplaintState:
-        reply_text = self.responder.generate_reply(
+    async def _reply_node(self, state: ComplaintState) -> dict:
+        reply_text = await self.responder.agenerate_reply(
             citizen_name=state["citizen_name"],
             complaint_text=state["message"],
             complaint_type=state["complaint_type"]
         )
-        state["reply"] = reply_text
-        state["action_taken"] = "AI Responded"
-        return state
+        return {"reply": reply_text, "action_taken": "AI Responded"}
+
+    # Step 2 (speculative): reply without waiting for the classifier
+    async def _speculative_reply_node(self, state: ComplaintState) -> dict:
+        reply_text = await self.responder.agenerate_reply(
+            citizen_name=state["citizen_name"],
+            complaint_text=state["message"],
+            complaint_type=state["provisional_type"] or "unknown"
+        )
+        return {"reply": reply_text, "action_taken": "AI Responded"}
+
+    # Step 2b (speculative): redo the reply only when the guess mattered
+    async def _reconcile_node(self, state: ComplaintState) -> dict:
+        complaint_type = state["complaint_type"]
+        if complaint_type == state["provisional_type"] or complaint_type not in RECONCILE_CATEGORIES:
+            return {}
+        return await self._reply_node(state)
+
+    # Steps 1+2 (combined): a single structured LLM call
+    async def _classify_reply_node(self, state: ComplaintState) -> dict:
+        complaint_type, reply_text = await self.responder.agenerate_classified_reply(
+            citizen_name=state["citizen_name"],
+            complaint_text=state["message"],
+        )
+        return {"complaint_type": complaint_type, "reply": reply_text, "action_taken": "AI Responded"}
+
+    # Step 1b: route the classified complaint to a department
+    async def _decide_action_node(self, state: ComplaintState) -> dict:
+        return {"department": route_department(state["complaint_type"])}
+
+    # Step 2 (routed): a fixed notice instead of an LLM reply
+    async def _routing_notice_node(self, state: ComplaintState) -> dict:
+        reply_text = (
+            f"Complaint categorized as '{state['complaint_type']}'. "
+            f"It has been routed to the {state['department']} department. "
+            "A representative will review it soon."
+        )
+        return {"reply": reply_text, "action_taken": state["department"]}
 
     # -------------------------
     # Step 3: persist to DB
     # -------------------------
-    async def _save_node(self, state: ComplaintState) -> ComplaintState:
-        db = state["db"]
-        complaint = Complaint(
+    async def _save_node(self, state: ComplaintState) -> dict:
+        fields = dict(
             citizen_name=state["citizen_name"],
             message=state["message"],
             complaint_type=state["complaint_type"],
             reply=state["reply"],
             action_taken=state["action_taken"],
+            status="done",
         )
-        db.add(complaint)
-        await db.commit()
-        await db.refresh(complaint)
-        state["saved_complaint"] = complaint
-        return state
+        # In async job mode complaint_id is the pending row created by the request
+        complaint = await save_complaint(state["db"], fields, state.get("complaint_id"), self.writer)
+        return {"saved_complaint": complaint}
+
+    async def _timed(self, mode: str, name: str, node, state: ComplaintState) -> dict:
+        start = time.perf_counter()
+        try:
+            return await node(state)
+        finally:
+            node_seconds.observe(time.perf_counter() - start, mode=mode, node=name)
 
     # -------------------------
     # Build the LangGraph flow
     # -------------------------
-    def _build_graph(self):
+    def build_graph(self, mode: str = COMPLAINT_GRAPH_MODE, persist: bool = True):
+        """
+        Compile the pipeline; with `persist=False` it stops before saving (bulk
+        import). Each node records its wall time in `complaint_graph_node_seconds`.
+        """
+        # Deferred: LangGraph is slow to import and only needed once per worker
+        from langgraph.graph import StateGraph, START, END
+
+        if mode not in GRAPH_MODES:
+            raise ValueError(f"Unknown graph mode {mode!r}, expected one of {GRAPH_MODES}")
+
         graph = StateGraph(ComplaintState)
-        graph.add_node("classify", self._classify_node)
-        graph.add_node("reply", self._reply_node)
-        graph.add_node("save", self._save_node)
 
-        graph.add_edge(START, "classify")
-        graph.add_edge("classify", "reply")
-        graph.add_edge("reply", "save")
-        graph.add_edge("save", END)
+        def add(name: str, node):
+            async def timed(state: ComplaintState) -> dict:
+                return await self._timed(mode, name, node, state)
+
+            graph.add_node(name, timed)
+
+        if persist:
+            add("save", self._save_node)
+            graph.add_edge("save", END)
+        last = "save" if persist else END
+        add("decide_action", self._decide_action_node)
+
+        if mode == "sequential":
+            add("classify", self._classify_node)
+            add("reply", self._reply_node)
+            graph.add_edge(START, "classify")
+            graph.add_edge("classify", "decide_action")
+            graph.add_edge("decide_action", "reply")
+            graph.add_edge("reply", last)
+        elif mode == "speculative":
+            add("classify", self._classify_node)
+            add("reply", self._speculative_reply_node)
+            add("reconcile", self._reconcile_node)
+            graph.add_edge(START, "classify")
+            graph.add_edge(START, "reply")
+            graph.add_edge("classify", "decide_action")
+            graph.add_edge(["decide_action", "reply"], "reconcile")
+            graph.add_edge("reconcile", last)
+        elif mode == "combined":
+            add("classify_reply", self._classify_reply_node)
+            graph.add_edge(START, "classify_reply")
+            graph.add_edge("classify_reply", "decide_action")
+            graph.add_edge("decide_action", last)
+        else:
+            add("classify", self._classify_node)
+            add("routing_notice", self._routing_notice_node)
+            graph.add_edge(START, "classify")
+            graph.add_edge("classify", "decide_action")
+            graph.add_edge("decide_action", "routing_notice")
+            graph.add_edge("routing_notice", last)
 
         return graph.compile()
 
+    # -------------------------
+    # Same flow, streaming the reply
+    # -------------------------
+    async def astream(self, state: ComplaintState, mode: str = COMPLAINT_GRAPH_MODE) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Run the `mode` pipeline for one complaint and yield (event, data):
+        `classified`, the reply as `token`s, then `complete` with the saved
+        complaint. Classification, routing and saving are the graph's own
+        nodes, so the saved row matches `build_graph(mode)`; only the reply
+        step streams:
+        - sequential, speculative: the reply LLM call, token by token. There
+          is no speculative guess here, as tokens already sent cannot be
+          reconciled with the final category.
+        - combined: the structured call returns the reply whole; one token.
+        - routed: the templated routing notice; one token.
+        The save uses its own session, since streaming outlives the request.
+        """
+        if mode not in GRAPH_MODES:
+            raise ValueError(f"Unknown graph mode {mode!r}, expected one of {GRAPH_MODES}")
+
+        if mode == "combined":
+            state.update(await self._timed(mode, "classify_reply", self._classify_reply_node, state))
+        else:
+            state.update(await self._timed(mode, "classify", self._classify_node, state))
+        state.update(await self._timed(mode, "decide_action", self._decide_action_node, state))
+        yield "classified", {"complaint_type": state["complaint_type"], "department": state["department"]}
+
+        if mode == "routed":
+            state.update(await self._timed(mode, "routing_notice", self._routing_notice_node, state))
+            yield "token", {"text": state["reply"]}
+        elif mode == "combined":
+            yield "token", {"text": state["reply"]}
+        else:
+            parts = []
+            start = time.perf_counter()
+            try:
+                async for token in self.responder.astream_reply(
+                    citizen_name=state["citizen_name"],
+                    complaint_text=state["message"],
+                    complaint_type=state["complaint_type"],
+                ):
+                    parts.append(token)
+                    yield "token", {"text": token}
+            finally:
+                node_seconds.observe(time.perf_counter() - start, mode=mode, node="reply")
+            state.update(reply="".join(parts).strip(), action_taken="AI Responded")
+
+        async with async_session() as db:
+            state["db"] = db
+            state.update(await self._timed(mode, "save", self._save_node, state))
+        yield "complete", ComplaintResponse.from_orm(state["saved_complaint"]).model_dump(mode="json")
+
+
+def node_timings(mode: str) -> dict:
+    """Per-node call count and mean/total wall time for one graph variant."""
+    return {
+        node: {
+            "count": node_seconds.count(mode=mode, node=node),
+            "mean_seconds": node_seconds.mean(mode=mode, node=node),
+            "total_seconds": node_seconds.sum(mode=mode, node=node),
+        }
+        for node in GRAPH_NODES[mode]
+    }
+
+
+# =========================
+#   Complaint queries
+# =========================
+MAX_PAGE_SIZE = 500
+
+
+def complaint_filter_clauses(filters: ComplaintFilter) -> list:
+    clauses = []
+    if filters.complaint_type:
+        clauses.append(Complaint.complaint_type == filters.complaint_type)
+    if filters.action_taken:
+        clauses.append(Complaint.action_taken == filters.action_taken)
+    if filters.citizen_name:
+        clauses.append(Complaint.citizen_name == filters.citizen_name)
+    if filters.created_from:
+        clauses.append(Complaint.created_at >= filters.created_from)
+    if filters.created_to:
+        clauses.append(Complaint.created_at < filters.created_to)
+    return clauses
+
+
+async def fetch_complaint_page(
+    db: AsyncSession, filters: ComplaintFilter, cursor: int | None = None, limit: int = 50
+) -> tuple[list[Complaint], int | None]:
+    """
+    Keyset pagination, newest first: rows with id below `cursor`.
+    Returns the rows and the cursor of the next page (None when exhausted).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = select(Complaint).where(*complaint_filter_clauses(filters))
+    if cursor is not None:
+        query = query.where(Complaint.id < cursor)
+    query = query.order_by(Complaint.id.desc()).limit(limit + 1)
+
+    rows = list((await db.execute(query)).scalars())
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+# =========================
+#   Complaint Service
+# =========================
+class ComplaintService:
+    """Thin per-request object: borrows models and the compiled graph from the registry."""
+
+    def __init__(self, db: AsyncSession, registry: ModelRegistry | None = None):
+        self.db = db
+        self.registry = registry or get_model_registry()
+
+    @property
+    def graph(self):
+        return self.registry.graph
+
     # -------------------------
     # Handle text complaint
     # -------------------------
-    async def handle_complaint(self, request: ComplaintRequest) -> ComplaintResponse:
+    async def handle_complaint(self, request: ComplaintRequest, complaint_id: int | None = None) -> ComplaintResponse:
         initial_state: ComplaintState = {
             "citizen_name": request.citizen_name,
             "message": request.message,
             "complaint_type": "",
+            "provisional_type": request.complaint_type or "",
             "reply": "",
             "action_taken": "",
             "db": self.db,
+            "complaint_id": complaint_id,
             "saved_complaint": None,
         }
 
         # Run through the LangGraph pipeline
-        final_state = await self.graph.ainvoke(initial_state)
+        with span("complaint_pipeline", complaint_id=complaint_id or 0):
+            final_state = await self.graph.ainvoke(initial_state)
         saved = final_state["saved_complaint"]
 
         return ComplaintResponse.from_orm(saved)
 
     # -------------------------
-    # Handle voice complaint
+    # Handle text complaint, streaming the reply
     # -------------------------
-    async def handle_voice_complaint(self, citizen_name: str, audio_file) -> ComplaintResponse:
-        # Step 1: save temporary audio file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-            tmp.write(await audio_file.read())
-            tmp_path = tmp.name
+    async def stream_complaint(self, request: ComplaintRequest) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Yields (event, data) pairs: `classified`, one `token` per reply fragment,
+        then `complete` with the saved complaint once the reply is persisted.
+        Runs the configured graph mode (see ComplaintPipeline.astream).
+        """
+        state: ComplaintState = {
+            "citizen_name": request.citizen_name,
+            "message": request.message,
+            "complaint_type": "",
+            "provisional_type": request.complaint_type or "",
+            "reply": "",
+            "action_taken": "",
+            "db": None,
+            "complaint_id": None,
+            "saved_complaint": None,
+        }
+        registry = self.registry
+        pipeline = ComplaintPipeline(registry.classifier, registry.responder, registry.write_queue)
+        async for event in pipeline.astream(state, registry.graph_mode or COMPLAINT_GRAPH_MODE):
+            yield event
+
+    # -------------------------
+    # Async job mode
+    # -------------------------
+    async def _submit_job(self, citizen_name: str, message: str, finish) -> ComplaintResponse:
+        """
+        Persist a pending row and finish it in the background. Call inside
+        `job_runner.reserve()`. `finish(service, complaint_id)` runs with a
+        service bound to the job's own session.
+        """
+        pending = Complaint(citizen_name=citizen_name, message=message, status="pending")
+        self.db.add(pending)
+        await self.db.commit()
+        await self.db.refresh(pending)
+
+        registry = self.registry
+        complaint_id = pending.id
+
+        async def job(db: AsyncSession):
+            await finish(ComplaintService(db, registry), complaint_id)
+
+        registry.job_runner.submit(complaint_id, job)
+        return ComplaintResponse.from_orm(pending)
+
+    async def get_complaint(self, complaint_id: int) -> Complaint | None:
+        return await self.db.get(Complaint, complaint_id, populate_existing=True)
+
+    async def list_complaints(self, filters: ComplaintFilter, cursor: int | None, limit: int) -> ComplaintPage:
+        rows, next_cursor = await fetch_complaint_page(self.db, filters, cursor, limit)
+        return ComplaintPage(items=[ComplaintResponse.from_orm(row) for row in rows], next_cursor=next_cursor)
+
+    async def export_complaints(self, filters: ComplaintFilter) -> AsyncIterator[ComplaintResponse]:
+        """Every matching complaint, newest first, read one keyset page at a time."""
+        cursor = None
+        # Streaming outlives the request-scoped session, so use a fresh one
+        async with async_session() as db:
+            while True:
+                rows, cursor = await fetch_complaint_page(db, filters, cursor, MAX_PAGE_SIZE)
+                for row in rows:
+                    yield ComplaintResponse.from_orm(row)
+                if cursor is None:
+                    break
+                db.expunge_all()
 
+    # -------------------------
+    # Handle voice complaint
+    # -------------------------
+    async def handle_voice_complaint(self, citizen_name: str, audio_file, async_mode: bool = False) -> ComplaintResponse:
+        # A full job queue is refused (JobQueueFull) before the upload is read
+        with self.registry.job_runner.reserve() if async_mode else nullcontext():
+            # Step 1: stream the upload through the decoder (no temp file, no full copy)
+            audio = await decode_upload(audio_file)
+
+            if async_mode:
+                return await self._submit_job(
+                    citizen_name, "",
+                    lambda service, complaint_id: service._complete_voice_complaint(citizen_name, audio, complaint_id),
+                )
+        return await self._complete_voice_complaint(citizen_name, audio)
+
+    async def _complete_voice_complaint(
+        self, citizen_name: str, audio: np.ndarray, complaint_id: int | None = None
+    ) -> ComplaintResponse:
         # Step 2: transcribe audio
-        transcript = await self._transcribe_audio(tmp_path)
-        print("Transcript:", transcript)
+        transcript = await self._transcribe_audio(audio)
 
         # Step 3: reuse text complaint flow
         complaint_request = ComplaintRequest(
             citizen_name=citizen_name,
             message=transcript
         )
-        return await self.handle_complaint(complaint_request)
+        return await self.handle_complaint(complaint_request, complaint_id)
 
     # -------------------------
     # Transcribe audio (local Whisper)
     # -------------------------
-    async def _transcribe_audio(self, file_path: str, language: Optional[str] = "en") -> str:
-        """Transcribe audio file using local Whisper model."""
-
-        def blocking_transcribe(path: str, lang: Optional[str]):
-            return _whisper_model.transcribe(path, language=lang, task="transcribe", temperature=0.0)
+    async def _transcribe_audio(self, audio: np.ndarray, language: Optional[str] = "en") -> str:
+        """Transcribe 16 kHz mono PCM using local Whisper model."""
 
-        result = await asyncio.to_thread(blocking_transcribe, file_path, language)
+        # Runs in a dedicated worker process; raises TranscriptionUnavailable when saturated
+        audio_seconds = round(len(audio) / SAMPLE_RATE, 2)
+        with stage("transcription", audio_seconds=audio_seconds):
+            result = await self.registry.transcription_pool.transcribe(audio, language)
 
         raw_text = result.get("text", "").strip()
-        print("WHISPER raw text:", repr(raw_text))
-        segments = result.get("segments", [])
-        print(f"WHISPER segments count: {len(segments)}")
-        for i, seg in enumerate(segments):
-            print(f"SEGMENT {i}: [{seg.get('start', 0):.2f} - {seg.get('end', 0):.2f}] {repr(seg.get('text'))}")
-
+        log.debug(
+            "transcribed",
+            chars=len(raw_text),
+            segments=len(result.get("segments", [])),
+            audio_seconds=audio_seconds,
+            sample=True,
+        )
         return raw_text
 
-    async def handle_image_complaint(self, citizen_name: str, message: str | None, image: UploadFile):
+    async def handle_image_complaint(
+        self, citizen_name: str, message: str | None, image: UploadFile, async_mode: bool = False
+    ):
         
-        # --- Step 1: Read image ---
-        image_bytes = await image.read()
-        img = Image.open(BytesIO(image_bytes)).convert("RGB")
-        img = img.resize((224, 224))
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-
-        # --- Step 2: Model prediction ---
-        prediction = self.image_model.predict(img_array)
-        predicted_class_index = np.argmax(prediction)
-        predicted_label = self.labels[predicted_class_index]
-
-        print("Predicted image class:", predicted_label)
+        # A full job queue is refused (JobQueueFull) before the upload is read
+        with self.registry.job_runner.reserve() if async_mode else nullcontext():
+            # --- Step 1: Read the image; a repeated upload is answered from the cache ---
+            image_bytes = await image.read()
+            cache = self.registry.image_cache
+            prediction, cache_key, img_array = None, None, None
+            if cache is not None:
+                digest = image_digest(image_bytes)
+                prediction = await cache.get(digest)
+
+            # --- Step 1b: Otherwise preprocess (decoded off the event loop) ---
+            if prediction is None:
+                with stage("image_preprocess", upload_bytes=len(image_bytes)):
+                    img_array = await self.registry.image_preprocessor.preprocess(image_bytes)
+                if cache is not None:
+                    phash = cache.perceptual_hash(img_array)
+                    prediction = cache.get_similar(phash)
+                    if prediction is not None:
+                        await cache.set(digest, phash, *prediction)
+                    else:
+                        cache_key = (digest, phash)
+
+            if async_mode:
+                return await self._submit_job(
+                    citizen_name, message or "",
+                    lambda service, complaint_id: service._complete_image_complaint(
+                        citizen_name, message, img_array, complaint_id, prediction, cache_key
+                    ),
+                )
+        return await self._complete_image_complaint(citizen_name, message, img_array, None, prediction, cache_key)
+
+    async def _complete_image_complaint(
+        self,
+        citizen_name: str,
+        message: str | None,
+        img_array: np.ndarray | None,
+        complaint_id: int | None = None,
+        prediction: tuple[str, float] | None = None,
+        cache_key: tuple[str, int | None] | None = None,
+    ) -> ComplaintResponse:
+        # --- Step 2: Model prediction (batched with concurrent requests) unless cached ---
+        if prediction is not None:
+            predicted_label, confidence = prediction
+        else:
+            with stage("image_inference"):
+                predicted_label, confidence = await self.registry.image_predictor.predict(img_array)
+            if cache_key is not None:
+                await self.registry.image_cache.set(*cache_key, predicted_label, confidence)
+        log.debug("image classified", label=predicted_label, confidence=round(confidence, 3), sample=True)
 
         # --- Step 3: Merge with message ---
         if message and message.strip() != "":
@@ -201,6 +545,4 @@ class ComplaintService:
             message=full_message
         )
 
-        return await self.handle_complaint(complaint_request)
-
-
+        return await self.handle_complaint(complaint_request, complaint_id)
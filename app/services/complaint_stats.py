@@ -0,0 +1,147 @@
+"""
+Incremental complaint rollups for dashboards.
+
+Every saved complaint bumps one hourly and one daily counter in
+`complaint_stats` inside the same transaction, so the stats endpoints read a
+table whose size depends on the time range asked for, not on the number of
+complaints. Rebuild the rollups from scratch (e.g. after a manual import):
+
+    python -m app.services.complaint_stats --rebuild
+"""
+import argparse
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai.routing import route_department
+from app.core.database import Base, async_session, engine, upgrade_schema
+from app.models.complaint_model import Complaint
+from app.models.complaint_stat_model import ComplaintStat
+
+BUCKETS = ("hour", "day")
+GROUP_BY_COLUMNS = {"complaint_type": ComplaintStat.complaint_type, "department": ComplaintStat.department}
+
+
+def utc_naive(moment: datetime | None) -> datetime:
+    """Buckets are naive UTC: aware times are converted, naive ones are taken as UTC, None is now."""
+    if moment is None:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def bucket_start(moment: datetime, bucket: str) -> datetime:
+    moment = utc_naive(moment).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if bucket == "day" else moment
+
+
+def _aggregate(complaints: Iterable[tuple[str | None, datetime | None]]) -> Counter:
+    counts = Counter()
+    for complaint_type, created_at in complaints:
+        complaint_type = complaint_type or "unknown"
+        department = route_department(complaint_type)
+        for bucket in BUCKETS:
+            counts[(bucket, bucket_start(created_at, bucket), complaint_type, department)] += 1
+    return counts
+
+
+async def record_complaints(db: AsyncSession, complaints: Iterable[tuple[str | None, datetime | None]]):
+    """
+    Add (complaint_type, created_at) pairs to the rollups, bucketed by each
+    row's own created_at exactly as `rebuild_stats` does. Call before the
+    commit that saves them so both land in the same transaction.
+    """
+    counts = _aggregate(complaints)
+    if counts:
+        await _upsert(db, counts)
+
+
+async def _upsert(db: AsyncSession, counts: Counter, chunk_size: int = 1000):
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    rows = [
+        {"bucket": bucket, "bucket_start": start, "complaint_type": complaint_type, "department": department, "count": n}
+        for (bucket, start, complaint_type, department), n in counts.items()
+    ]
+    # Chunked to stay under the bound-parameter limit of a single statement
+    for offset in range(0, len(rows), chunk_size):
+        statement = insert(ComplaintStat).values(rows[offset:offset + chunk_size])
+        statement = statement.on_conflict_do_update(
+            index_elements=["bucket", "bucket_start", "complaint_type", "department"],
+            set_={"count": ComplaintStat.count + statement.excluded.count},
+        )
+        await db.execute(statement)
+
+
+async def query_stats(
+    db: AsyncSession,
+    bucket: str,
+    group_by: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[dict]:
+    column = GROUP_BY_COLUMNS[group_by]
+    query = select(ComplaintStat.bucket_start, column, func.sum(ComplaintStat.count)).where(
+        ComplaintStat.bucket == bucket
+    )
+    if start:
+        query = query.where(ComplaintStat.bucket_start >= bucket_start(start, bucket))
+    if end:
+        query = query.where(ComplaintStat.bucket_start < utc_naive(end))
+    query = query.group_by(ComplaintStat.bucket_start, column).order_by(ComplaintStat.bucket_start, column)
+
+    return [
+        {"bucket_start": started, group_by: key, "count": int(total)}
+        for started, key, total in await db.execute(query)
+    ]
+
+
+async def rebuild_stats(db: AsyncSession, batch_size: int = 10_000) -> int:
+    """Recompute all rollups from the complaints table; returns the number of complaints counted."""
+    # The counters only grow with the number of buckets, so aggregate everything first
+    counts = Counter()
+    counted = 0
+    result = await db.stream(
+        select(Complaint.complaint_type, Complaint.created_at)
+        .where(Complaint.status == "done")
+        .execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions(batch_size):
+        counts.update(_aggregate(rows))
+        counted += len(rows)
+
+    await db.execute(delete(ComplaintStat))
+    if counts:
+        await _upsert(db, counts)
+    await db.commit()
+    return counted
+
+
+async def _main():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+    async with async_session() as db:
+        counted = await rebuild_stats(db)
+    await engine.dispose()
+    print(f"Rebuilt complaint stats from {counted} complaints")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the complaint_stats rollup table")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every rollup from the complaints table")
+    args = parser.parse_args()
+    if args.rebuild:
+        asyncio.run(_main())
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
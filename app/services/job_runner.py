@@ -0,0 +1,149 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai.transcription_pool import TranscriptionQueueFull
+from app.core import metrics
+from app.core.log import get_logger
+from app.core.database import async_session
+from app.models.complaint_model import Complaint
+
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+JOB_SHUTDOWN_GRACE = float(os.getenv("JOB_SHUTDOWN_GRACE", "10"))
+# Jobs queued or running per worker; each one holds its decoded audio or image
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "64"))
+# Mark jobs left pending/processing by a previous run as failed at startup.
+# Turn off when several workers share one database: a starting worker cannot
+# tell a sibling's running jobs from abandoned ones.
+JOB_FAIL_ABANDONED = os.getenv("JOB_FAIL_ABANDONED", "1") == "1"
+
+log = get_logger(__name__)
+
+jobs_in_flight = metrics.gauge("complaint_jobs_in_flight", "Async complaint jobs queued or running")
+jobs_finished = metrics.counter("complaint_jobs_total", "Async complaint jobs finished", ["status"])
+jobs_rejected = metrics.counter("complaint_jobs_rejected_total", "Async complaint jobs refused, queue full")
+job_seconds = metrics.histogram("complaint_job_seconds", "Time an async complaint job runs")
+
+Job = Callable[[AsyncSession], Awaitable[object]]
+
+
+class JobQueueFull(TranscriptionQueueFull):
+    """Too many async complaint jobs queued; answered like a full transcription queue (429)."""
+
+
+class JobRunner:
+    """
+    Finishes async-mode complaints in the background.
+
+    Each job gets its own database session and completes a `pending` row
+    created by the request. Waiters (long-poll, SSE) are woken through a
+    per-complaint event when the job ends.
+
+    At most `max_queued` jobs are queued or running. Requests take a slot
+    with `reserve()` before reading their upload, so a full queue is refused
+    up front instead of piling up decoded data.
+    """
+
+    def __init__(
+        self, concurrency: int = JOB_CONCURRENCY, session_factory=async_session, max_queued: int = JOB_QUEUE_SIZE
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        self._events: dict[int, asyncio.Event] = {}
+        self._reserved = 0
+
+    def _retry_after(self) -> int:
+        # Time for the jobs ahead to drain, assuming the average job length
+        per_job = job_seconds.mean() or 10.0
+        return max(1, math.ceil(per_job * (len(self._tasks) + self._reserved) / self.concurrency))
+
+    @contextmanager
+    def reserve(self):
+        """Hold a queue slot until the job is submitted; raises JobQueueFull when none is free."""
+        if len(self._tasks) + self._reserved >= self.max_queued:
+            jobs_rejected.inc()
+            raise JobQueueFull("Too many complaints are being processed", self._retry_after())
+        self._reserved += 1
+        try:
+            yield
+        finally:
+            self._reserved -= 1
+
+    def submit(self, complaint_id: int, job: Job):
+        """Queue `job`; call inside `reserve()` so the queue stays bounded."""
+        self._events[complaint_id] = asyncio.Event()
+        task = asyncio.create_task(self._run(complaint_id, job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        jobs_in_flight.set(len(self._tasks))
+
+    async def _run(self, complaint_id: int, job: Job):
+        try:
+            async with self._semaphore:
+                await self._set_status(complaint_id, "processing")
+                start = time.perf_counter()
+                async with self.session_factory() as db:
+                    await job(db)
+                job_seconds.observe(time.perf_counter() - start)
+            jobs_finished.inc(status="done")
+        except asyncio.CancelledError:
+            # Shutdown; don't leave the row looking unfinished
+            jobs_finished.inc(status="failed")
+            await self._set_status(complaint_id, "failed", action_taken="Failed: shut down")
+            raise
+        except Exception as e:
+            log.error("complaint job failed", complaint_id=complaint_id, error=str(e), exc_info=True)
+            jobs_finished.inc(status="failed")
+            await self._set_status(complaint_id, "failed", action_taken=f"Failed: {type(e).__name__}")
+        finally:
+            self._events.pop(complaint_id).set()
+            jobs_in_flight.set(len(self._tasks) - 1)
+
+    async def _set_status(self, complaint_id: int, status: str, **fields):
+        async with self.session_factory() as db:
+            complaint = await db.get(Complaint, complaint_id)
+            if complaint is None:
+                return
+            complaint.status = status
+            for name, value in fields.items():
+                setattr(complaint, name, value)
+            await db.commit()
+
+    async def fail_abandoned(self) -> int:
+        """Mark rows left `pending`/`processing` by a previous run as failed; returns how many."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(Complaint)
+                .where(Complaint.status.in_(("pending", "processing")))
+                .values(status="failed", action_taken="Failed: interrupted by restart")
+            )
+            await db.commit()
+        return result.rowcount
+
+    async def wait(self, complaint_id: int, timeout: float) -> None:
+        """Return when the job for `complaint_id` ends, or after `timeout` seconds."""
+        event = self._events.get(complaint_id)
+        if event is None:
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def aclose(self, grace: float = JOB_SHUTDOWN_GRACE):
+        if not self._tasks:
+            return
+        _, still_running = await asyncio.wait(set(self._tasks), timeout=grace)
+        for task in still_running:
+            task.cancel()
+        # Cancelled jobs mark their rows failed on the way out
+        await asyncio.gather(*still_running, return_exceptions=True)
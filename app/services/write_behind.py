@@ -0,0 +1,254 @@
+"""
+Write-behind persistence for analysed complaints.
+
+With WRITE_BEHIND_ENABLED=1 the save step no longer commits per complaint:
+rows go onto an in-process queue and one writer task saves them in grouped
+transactions of up to WRITE_BEHIND_MAX_ROWS rows, or whatever arrived within
+WRITE_BEHIND_MAX_DELAY_MS. Each caller awaits a future that carries the
+assigned id.
+
+WRITE_BEHIND_DURABLE=1 (default) resolves that future only after the group
+is committed. With 0 it resolves as soon as the row has its id inside the
+open transaction, so responses do not wait for the commit at all; a failed
+commit is then only logged and those complaints are lost.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.database import async_session
+from app.core.log import get_logger
+from app.core.tracing import stage
+from app.models.complaint_model import Complaint
+from app.services.complaint_stats import record_complaints
+
+log = get_logger(__name__)
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "0") == "1"
+WRITE_BEHIND_MAX_ROWS = int(os.getenv("WRITE_BEHIND_MAX_ROWS", "200"))
+WRITE_BEHIND_MAX_DELAY_MS = float(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "20"))
+WRITE_BEHIND_DURABLE = os.getenv("WRITE_BEHIND_DURABLE", "1") == "1"
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", "10000"))
+
+queue_depth = metrics.gauge("write_behind_queue_depth", "Complaints waiting for the writer")
+batch_rows = metrics.histogram("write_behind_batch_rows", "Complaints saved per grouped transaction")
+flush_seconds = metrics.histogram("write_behind_flush_seconds", "Time to write and commit one group")
+failed_rows = metrics.counter("write_behind_failed_total", "Complaints whose group failed to save")
+
+
+class MissingComplaint(LookupError):
+    """The pending complaint to complete no longer exists."""
+
+
+class WriteBehindQueue:
+    """
+    Single writer that saves complaints in grouped transactions.
+
+    `save(fields)` inserts a new complaint, `save(fields, complaint_id)`
+    completes an existing (pending) row; both return the saved row's id and
+    created_at. `aclose()` stops taking new rows and waits until everything
+    already queued is written.
+    """
+
+    def __init__(
+        self,
+        session_factory=async_session,
+        max_rows: int = WRITE_BEHIND_MAX_ROWS,
+        max_delay_ms: float = WRITE_BEHIND_MAX_DELAY_MS,
+        durable: bool = WRITE_BEHIND_DURABLE,
+        max_queue: int = WRITE_BEHIND_QUEUE_SIZE,
+    ):
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000.0
+        self.durable = durable
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def _ensure_started(self):
+        if self._writer is None or self._writer.done():
+            if self._writer is not None:
+                self._fail_queued(self._writer)
+            # Bounded, so a stalled database pushes back on requests instead of growing memory
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            # Fresh context: the writer serves every request, not the trace of the first caller
+            self._writer = contextvars.Context().run(asyncio.create_task, self._write_loop())
+
+    def _fail_queued(self, writer: asyncio.Task):
+        """Fail the rows a dead writer left in its queue; their callers would otherwise wait forever."""
+        error = None if writer.cancelled() else writer.exception()
+        log.error("write-behind writer stopped, restarting", queued=self._queue.qsize(), error=str(error))
+        error = RuntimeError(f"Write-behind writer stopped: {error}")
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if item is None:
+                continue
+            _, _, future = item
+            if not future.done():
+                failed_rows.inc()
+                future.set_exception(error)
+
+    async def save(self, fields: dict, complaint_id: int | None = None) -> dict:
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((fields, complaint_id, future))
+        queue_depth.set(self._queue.qsize())
+        return await future
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            stop = False
+            while len(batch) < self.max_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            queue_depth.set(self._queue.qsize())
+            await self._flush(batch)
+            if stop:
+                return
+
+    async def _flush(self, batch: list):
+        start = time.perf_counter()
+        try:
+            with stage("db_commit", rows=len(batch)):
+                async with self.session_factory() as db:
+                    saved = await self._write(db, batch)
+                    if not self.durable:
+                        self._resolve(batch, saved)
+                    await db.commit()
+        except Exception as e:
+            failed_rows.inc(len(batch))
+            log.error("write-behind group failed", rows=len(batch), error=str(e))
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._resolve(batch, saved)
+        batch_rows.observe(len(batch))
+        flush_seconds.observe(time.perf_counter() - start)
+
+    @staticmethod
+    def _resolve(batch: list, saved: list):
+        for (_, _, future), row in zip(batch, saved):
+            if future.done():  # caller went away
+                continue
+            if isinstance(row, Exception):
+                future.set_exception(row)
+            else:
+                future.set_result(row)
+
+    async def _write(self, db: AsyncSession, batch: list) -> list:
+        """Saved {id, created_at} per row, or the exception for a row that alone could not be saved."""
+        saved: list = [None] * len(batch)
+        new = [(i, fields) for i, (fields, complaint_id, _) in enumerate(batch) if complaint_id is None]
+        if new:
+            inserted = await db.execute(
+                insert(Complaint).returning(Complaint.id, Complaint.created_at, sort_by_parameter_order=True),
+                [fields for _, fields in new],
+            )
+            for (i, _), row in zip(new, inserted):
+                saved[i] = {"id": row.id, "created_at": row.created_at}
+
+        for i, (fields, complaint_id, _) in enumerate(batch):
+            if complaint_id is None:
+                continue
+            updated = await db.execute(
+                update(Complaint)
+                .where(Complaint.id == complaint_id)
+                .values(**fields)
+                .returning(Complaint.id, Complaint.created_at)
+            )
+            row = updated.one_or_none()
+            if row is None:
+                # Only this caller fails; the rest of the group still commits
+                failed_rows.inc()
+                saved[i] = MissingComplaint(f"Complaint {complaint_id} no longer exists")
+                continue
+            saved[i] = {"id": row.id, "created_at": row.created_at}
+
+        await record_complaints(db, [
+            (fields.get("complaint_type"), row["created_at"])
+            for (fields, _, _), row in zip(batch, saved) if isinstance(row, dict)
+        ])
+        return saved
+
+    def stats(self) -> dict:
+        return {
+            "durable": self.durable,
+            "max_rows": self.max_rows,
+            "max_delay_ms": self.max_delay * 1000,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "groups": batch_rows.count(),
+            "mean_group_rows": batch_rows.mean(),
+            "mean_flush_seconds": flush_seconds.mean(),
+            "failed": int(failed_rows.value()),
+        }
+
+    async def aclose(self):
+        self._closed = True
+        if self._writer is None or self._writer.done():
+            return
+        # FIFO: the sentinel is reached only after every queued row is written
+        await self._queue.put(None)
+        await self._writer
+        self._writer = None
+
+
+async def save_complaint(
+    db: AsyncSession,
+    fields: dict,
+    complaint_id: int | None = None,
+    writer: WriteBehindQueue | None = None,
+) -> Complaint:
+    """
+    Save one analysed complaint and return it. Goes through `writer` when
+    write-behind is on; otherwise adds (or completes `complaint_id`),
+    records the rollups and commits on `db` right away.
+    """
+    if writer is not None:
+        saved = await writer.save(fields, complaint_id)
+        return Complaint(**fields, **saved)
+
+    with stage("db_commit", rows=1):
+        if complaint_id is not None:
+            complaint = await db.get(Complaint, complaint_id)
+            if complaint is None:
+                raise MissingComplaint(f"Complaint {complaint_id} no longer exists")
+            for name, value in fields.items():
+                setattr(complaint, name, value)
+        else:
+            complaint = Complaint(**fields)
+            db.add(complaint)
+        # Bucket by the row's own created_at; the INSERT returns it (eager_defaults)
+        await db.flush()
+        await record_complaints(db, [(fields.get("complaint_type"), complaint.created_at)])
+        await db.commit()
+        await db.refresh(complaint)
+    return complaint
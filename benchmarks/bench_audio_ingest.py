@@ -0,0 +1,100 @@
+"""
+Peak RSS of the streaming audio ingest path across upload sizes.
+
+Each case runs in a fresh subprocess so ru_maxrss is not polluted by the
+previous one. Clips of the same duration are encoded at very different
+bitrates: peak memory should follow the decoded duration, not the size of
+the upload. Exits non-zero when the RSS growth (peak minus baseline) of the
+cases differs by more than `--max-spread-mb`, or when any case grows by
+more than `--max-growth-mb` (if given).
+
+    python -m benchmarks.bench_audio_ingest --seconds 120 --max-spread-mb 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+CASES = [
+    # (suffix, extra ffmpeg output args)
+    (".mp3", ["-b:a", "32k"]),
+    (".mp3", ["-b:a", "320k"]),
+    (".wav", ["-ar", "48000", "-ac", "2"]),
+]
+
+
+class FileUpload:
+    """Minimal stand-in for fastapi.UploadFile reading from disk."""
+
+    def __init__(self, path: str):
+        self.filename = os.path.basename(path)
+        self._file = open(path, "rb")
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+
+def measure(path: str) -> None:
+    from app.ai.audio_stream import decode_upload
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    audio = asyncio.run(decode_upload(FileUpload(path)))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "upload_mb": round(os.path.getsize(path) / 2**20, 2),
+        "decoded_seconds": round(len(audio) / 16000, 1),
+        "baseline_rss_mb": round(baseline / 1024, 1),
+        "peak_rss_mb": round(peak / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=int, default=120)
+    parser.add_argument("--max-spread-mb", type=float, default=8.0,
+                        help="largest allowed difference in RSS growth between cases")
+    parser.add_argument("--max-growth-mb", type=float, help="largest allowed RSS growth of any case")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (suffix, output_args) in enumerate(CASES):
+            path = os.path.join(tmp, f"clip{i}{suffix}")
+            subprocess.run(
+                ["ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={args.seconds}",
+                 *output_args, path],
+                check=True,
+            )
+            measured = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_audio_ingest", "--measure", path],
+                check=True, capture_output=True, text=True,
+            )
+            result = json.loads(measured.stdout.strip().splitlines()[-1])
+            result["case"] = f"{suffix[1:]} {' '.join(output_args)}"
+            result["growth_mb"] = round(result["peak_rss_mb"] - result["baseline_rss_mb"], 1)
+            results.append(result)
+
+    growth = [result["growth_mb"] for result in results]
+    spread = round(max(growth) - min(growth), 1)
+    print(json.dumps({"results": results, "growth_spread_mb": spread}, indent=2))
+
+    failures = []
+    if spread > args.max_spread_mb:
+        failures.append(f"RSS growth spread {spread} MB above {args.max_spread_mb} MB")
+    if args.max_growth_mb is not None and max(growth) > args.max_growth_mb:
+        failures.append(f"RSS growth {max(growth)} MB above {args.max_growth_mb} MB")
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
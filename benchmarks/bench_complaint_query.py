@@ -0,0 +1,119 @@
+"""
+Latency of the keyset-paginated complaint list at scale.
+
+Seeds a throwaway SQLite file with `--rows` complaints (spread over types,
+actions, citizens and a year of timestamps), then times deep and filtered
+page fetches through fetch_complaint_page. Exits non-zero when a query's
+p95 exceeds `--max-ms`.
+
+    python -m benchmarks.bench_complaint_query --rows 1000000 --max-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.complaint_dto import ComplaintFilter
+from app.models.complaint_model import Complaint  # noqa: F401  (registers the table on Base)
+from app.services.complaint_service import fetch_complaint_page
+
+TYPES = ["neighbor", "noise", "dogs", "cars", "city_services", "robbery", "assault", "utilities"]
+ACTIONS = ["AI Responded", "AI Classified", "Pending AI Review"]
+START = datetime(2025, 1, 1)
+
+
+def seed(path: str, rows: int, batch: int = 50_000):
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+    rng = random.Random(42)
+    columns = "citizen_name, message, complaint_type, action_taken, reply, created_at, status"
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        for offset in range(0, rows, batch):
+            conn.executemany(
+                f"INSERT INTO complaints ({columns}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        f"citizen {rng.randrange(50_000)}",
+                        "Synthetic complaint text",
+                        rng.choice(TYPES),
+                        rng.choice(ACTIONS),
+                        "Synthetic reply",
+                        (START + timedelta(seconds=(offset + i) * 31_536_000 // rows)).isoformat(" "),
+                        "done",
+                    )
+                    for i in range(min(batch, rows - offset))
+                ],
+            )
+        conn.execute("ANALYZE")
+
+
+async def time_query(session_factory, filters: ComplaintFilter, cursor, repeat: int) -> list[float]:
+    timings = []
+    async with session_factory() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await fetch_complaint_page(db, filters, cursor, 50)
+            timings.append((time.perf_counter() - start) * 1000)
+            db.expunge_all()
+    return sorted(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--max-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        seed(path, args.rows)
+        print(f"Seeded {args.rows} rows in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        deep_cursor = args.rows // 10  # a page near the oldest rows
+        cases = {
+            "first_page": (ComplaintFilter(), None),
+            "deep_page": (ComplaintFilter(), deep_cursor),
+            "by_type": (ComplaintFilter(complaint_type="dogs"), None),
+            "by_type_deep": (ComplaintFilter(complaint_type="dogs"), deep_cursor),
+            "by_action": (ComplaintFilter(action_taken="AI Classified"), deep_cursor),
+            "by_citizen": (ComplaintFilter(citizen_name="citizen 123"), None),
+            "created_range": (
+                ComplaintFilter(created_from=START + timedelta(days=100), created_to=START + timedelta(days=101)),
+                None,
+            ),
+        }
+
+        results, failed = [], False
+        for name, (filters, cursor) in cases.items():
+            timings = await time_query(session_factory, filters, cursor, args.repeat)
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            failed |= p95 > args.max_ms
+            results.append({"query": name, "p50_ms": round(timings[len(timings) // 2], 2), "p95_ms": round(p95, 2)})
+        await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+    if failed:
+        sys.exit(f"p95 above {args.max_ms} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
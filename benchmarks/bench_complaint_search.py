@@ -0,0 +1,135 @@
+"""
+Full-text complaint search against a LIKE scan.
+
+Seeds a throwaway SQLite file with `--rows` complaints in English and Arabic
+(the FTS triggers index them as they are inserted), then times
+search_complaints for a few queries next to the equivalent
+`message LIKE '%word%'` scan. Exits non-zero when a search's p95 exceeds
+`--max-ms`.
+
+    python -m benchmarks.bench_complaint_search --rows 200000 --max-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.complaint_model import Complaint  # noqa: F401  (registers the table on Base)
+from app.services.complaint_search import ensure_search_index, search_complaints
+
+ENGLISH = (
+    "water pipe leak street light broken garbage noise neighbor dog barking car parked "
+    "sidewalk electricity outage night morning park road pothole building smell traffic"
+).split()
+ARABIC = (
+    "مياه تسريب انقطاع الكهرباء الكَهرباء شارع إنارة مكسورة قمامة ضوضاء الجيران كلب "
+    "سيارة رصيف ليلاً صباحاً حديقة طريق حفرة مبنى رائحة زحمة"
+).split()
+QUERIES = {
+    "english_word": ("pothole", "pothole"),
+    "english_and": ("water leak", "water"),
+    "english_prefix": ("bark*", "bark"),
+    "arabic_word": ("الكهرباء", "الكهرباء"),
+    "arabic_prefix": ("تسر*", "تسر"),
+}
+
+
+def _sentence(rng: random.Random) -> str:
+    words = ENGLISH if rng.random() < 0.6 else ARABIC
+    return " ".join(rng.choice(words) for _ in range(rng.randint(6, 18)))
+
+
+def seed(path: str, rows: int, batch: int = 20_000):
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        ensure_search_index(conn)
+    sync_engine.dispose()
+
+    rng = random.Random(42)
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        for offset in range(0, rows, batch):
+            conn.executemany(
+                "INSERT INTO complaints (citizen_name, message, complaint_type, reply, status) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (f"citizen {rng.randrange(50_000)}", _sentence(rng), "other", _sentence(rng), "done")
+                    for _ in range(min(batch, rows - offset))
+                ],
+            )
+
+
+def time_like(path: str, word: str, repeat: int) -> list[float]:
+    timings = []
+    with sqlite3.connect(path) as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(
+                "SELECT id, message FROM complaints WHERE message LIKE ? OR reply LIKE ? LIMIT 20",
+                (f"%{word}%", f"%{word}%"),
+            ).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+async def time_search(session_factory, query: str, repeat: int) -> tuple[list[float], int]:
+    timings, hits = [], 0
+    async with session_factory() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hits = len(await search_complaints(db, query, limit=20))
+            timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings), hits
+
+
+def _p95(timings: list[float]) -> float:
+    return timings[max(0, int(len(timings) * 0.95) - 1)]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--max-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        seed(path, args.rows)
+        print(f"Seeded and indexed {args.rows} rows in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        results, failed = [], False
+        for name, (query, like_word) in QUERIES.items():
+            fts, hits = await time_search(session_factory, query, args.repeat)
+            like = time_like(path, like_word, args.repeat)
+            failed |= _p95(fts) > args.max_ms
+            results.append({
+                "query": name,
+                "hits": hits,
+                "fts_p50_ms": round(fts[len(fts) // 2], 2),
+                "fts_p95_ms": round(_p95(fts), 2),
+                "like_p50_ms": round(like[len(like) // 2], 2),
+            })
+        await engine.dispose()
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if failed:
+        sys.exit(f"p95 above {args.max_ms} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
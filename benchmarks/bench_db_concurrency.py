@@ -0,0 +1,76 @@
+"""
+Commit throughput of concurrent single-complaint saves, default vs tuned SQLite.
+
+Runs `--tasks` coroutines that each insert and commit `--commits` complaints
+(the `_save_node` pattern), first on a plain `create_async_engine` and then
+on `make_engine` with the WAL/synchronous/busy-timeout pragmas, each against
+a fresh file. Reports commits per second and "database is locked" failures.
+
+    python -m benchmarks.bench_db_concurrency --tasks 32 --commits 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, make_engine
+from app.models.complaint_model import Complaint
+
+
+async def run(engine, tasks: int, commits: int) -> dict:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    failures = 0
+
+    async def writer(n: int):
+        nonlocal failures
+        for i in range(commits):
+            try:
+                async with session_factory() as db:
+                    complaint = Complaint(
+                        citizen_name=f"citizen {n}",
+                        message=f"Synthetic complaint {i}",
+                        complaint_type="noise",
+                        reply="Synthetic reply",
+                        action_taken="AI Responded",
+                    )
+                    db.add(complaint)
+                    await db.commit()
+                    await db.refresh(complaint)
+            except OperationalError:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(n) for n in range(tasks)))
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    done = tasks * commits - failures
+    return {"commits": done, "failures": failures, "seconds": round(elapsed, 2), "commits_per_s": round(done / elapsed, 1)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=32)
+    parser.add_argument("--commits", type=int, default=50)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        default_url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'default.db')}"
+        tuned_url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'tuned.db')}"
+        results["default"] = await run(create_async_engine(default_url), args.tasks, args.commits)
+        results["tuned"] = await run(make_engine(tuned_url), args.tasks, args.commits)
+
+    results["speedup"] = round(results["tuned"]["commits_per_s"] / max(results["default"]["commits_per_s"], 1e-9), 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Compare handle_complaint latency across the complaint graph modes.
+
+The LLM is replaced by a stub with a fixed delay per call, so the numbers
+show how many round trips each mode pays rather than model speed.
+
+    python -m benchmarks.bench_graph_modes --delay 0.5 --requests 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.ai.complaint_classifier import ComplaintClassifier
+from app.ai.complaint_responder import ComplaintResponder
+from app.core.database import Base
+from app.core.registry import ModelRegistry
+from app.models.complaint_dto import ComplaintRequest
+from app.services.complaint_service import GRAPH_MODES, ComplaintService, node_timings
+
+
+class StubLLMClient:
+    """Answers every prompt after `delay` seconds, like a slow Ollama would."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.base_url = "stub://ollama"
+        self.model = "stub"
+        self.calls = 0
+
+    async def generate(self, prompt: str, timeout=None, **options) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if options.get("format") == "json":
+            return json.dumps({"category": "noise", "reply": "تم استلام شكواك."})
+        if "Classify this citizen complaint" in prompt:
+            return "noise"
+        return "تم استلام شكواك."
+
+    async def stream(self, prompt: str, timeout=None, **options):
+        yield await self.generate(prompt, timeout=timeout, **options)
+
+
+async def run_mode(mode: str, delay: float, requests: int) -> dict:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    llm = StubLLMClient(delay)
+    registry = ModelRegistry(graph_mode=mode)
+    # Plain classifier/responder: no local tier or result cache, every call hits the stub
+    registry.register("classifier", ComplaintClassifier(client=llm))
+    registry.register("responder", ComplaintResponder(client=llm))
+
+    latencies = []
+    async with session_factory() as db:
+        service = ComplaintService(db, registry)
+        for i in range(requests):
+            request = ComplaintRequest(citizen_name=f"citizen {i}", message="Loud music every night")
+            start = time.perf_counter()
+            await service.handle_complaint(request)
+            latencies.append(time.perf_counter() - start)
+
+    await engine.dispose()
+    return {
+        "mode": mode,
+        "llm_calls_per_request": llm.calls / requests,
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1),
+        "node_mean_ms": {node: round(t["mean_seconds"] * 1000, 1) for node, t in node_timings(mode).items()},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds per stub LLM call")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    results = [await run_mode(mode, args.delay, args.requests) for mode in GRAPH_MODES]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
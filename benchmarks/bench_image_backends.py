@@ -0,0 +1,112 @@
+"""
+Accuracy and latency of the Keras image model vs its TFLite exports.
+
+For each backend: top-1 accuracy on the validation split, agreement with
+the Keras predictions, mean latency at batch 1 and batch 16, model file
+size and RSS growth after loading. Missing .tflite files are skipped
+(create them with `python -m app.ai.training.export_tflite --quantize ...`).
+
+    python -m benchmarks.bench_image_backends --limit 500 --out backends.json
+"""
+import argparse
+import json
+import os
+import resource
+import time
+
+import numpy as np
+
+from app.ai.image_preprocessing import load_image
+from app.ai.training.data import DATASET_DIR, load_class_indices, list_dataset
+from app.ai.training.export_tflite import DEFAULT_KERAS_PATH, QUANTIZATION_MODES, default_tflite_path
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_backend(name: str, path: str):
+    if name == "keras":
+        import tensorflow as tf
+
+        return tf.keras.models.load_model(path)
+
+    from app.ai.tflite_backend import TFLiteModel
+
+    return TFLiteModel(path)
+
+
+def latency_ms(model, images: np.ndarray, batch_size: int, repeats: int) -> float:
+    batch = images[:batch_size]
+    if len(batch) < batch_size:
+        batch = np.resize(batch, (batch_size, *images.shape[1:])).astype(np.float32)
+    model.predict(batch, verbose=0)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict(batch, verbose=0)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def predict_all(model, images: np.ndarray, batch_size: int = 32) -> np.ndarray:
+    return np.concatenate([
+        model.predict(images[i:i + batch_size], verbose=0) for i in range(0, len(images), batch_size)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dataset", default=DATASET_DIR)
+    parser.add_argument("--keras", default=DEFAULT_KERAS_PATH)
+    parser.add_argument("--limit", type=int, default=500, help="validation images to score")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--out", help="also write the report to this file")
+    args = parser.parse_args()
+
+    items = list_dataset(args.dataset, subset="validation", class_indices=load_class_indices())[:args.limit]
+    if not items:
+        raise SystemExit(f"no validation images under {args.dataset}")
+    images = np.stack([load_image(path) for path, _ in items])
+    truth = np.array([label for _, label in items])
+
+    backends = [("keras", args.keras)]
+    backends += [(f"tflite-{mode}", default_tflite_path(mode)) for mode in QUANTIZATION_MODES]
+
+    results, reference = [], None
+    for name, path in backends:
+        if not os.path.exists(path):
+            print(f"{path} not found; skipping {name}")
+            continue
+        before = rss_mb()
+        model = load_backend(name, path)
+        loaded = rss_mb()
+
+        predicted = predict_all(model, images).argmax(axis=1)
+        if reference is None:
+            reference = predicted
+        results.append({
+            "backend": name,
+            "file_mb": round(os.path.getsize(path) / 1e6, 2),
+            "accuracy": round(float((predicted == truth).mean()), 4),
+            "agreement_with_keras": round(float((predicted == reference).mean()), 4),
+            "batch1_ms": round(latency_ms(model, images, 1, args.repeats), 2),
+            "batch16_ms": round(latency_ms(model, images, 16, args.repeats), 2),
+            "load_rss_mb": round(loaded - before, 1),
+        })
+        del model
+
+    report = {"images": len(items), "cpus": os.cpu_count(), "results": results}
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
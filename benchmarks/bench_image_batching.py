@@ -0,0 +1,69 @@
+"""
+Throughput and latency of BatchPredictor at different batch sizes.
+
+Fires `--requests` concurrent single-image predictions and reports images/s
+and p50/p95 latency per max batch size. Uses a tiny Keras model unless
+`--model` points at a saved one.
+
+    python -m benchmarks.bench_image_batching --requests 256 --batch-sizes 1 4 16 32
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from app.ai.batch_inference import BatchPredictor
+
+
+def tiny_model(num_classes: int = 5):
+    return tf.keras.Sequential([
+        tf.keras.layers.Input((224, 224, 3)),
+        tf.keras.layers.Conv2D(8, 3, strides=4, activation="relu"),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(num_classes, activation="softmax"),
+    ])
+
+
+async def run(model, batch_size: int, wait_ms: float, requests: int) -> dict:
+    predictor = BatchPredictor(model, {i: str(i) for i in range(5)}, max_batch_size=batch_size, max_wait_ms=wait_ms)
+    images = np.random.rand(requests, 224, 224, 3).astype(np.float32)
+    await predictor.predict(images[0])  # warm-up: trace the model once
+
+    async def one(image):
+        start = time.perf_counter()
+        await predictor.predict(image)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(image) for image in images))
+    elapsed = time.perf_counter() - start
+    await predictor.aclose()
+
+    latencies = sorted(latencies)
+    return {
+        "max_batch_size": batch_size,
+        "images_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", help="path to a saved Keras model")
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--wait-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model) if args.model else tiny_model()
+    results = [await run(model, size, args.wait_ms, args.requests) for size in args.batch_sizes]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Image prediction cache: lookup cost and perceptual-hash matching.
+
+Reports the time of an exact (sha256) hit against decoding the upload, and
+how often re-encoded or resized copies of a photo match the original within
+`--distance`, next to the false-match rate between unrelated photos.
+Uses synthetic smooth images unless `--images` points at a directory.
+
+    python -m benchmarks.bench_image_cache --images app/ai/training/dataset --limit 200
+"""
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.ai.image_cache import ImagePredictionCache, difference_hash, image_digest
+from app.ai.image_preprocessing import load_image
+from app.ai.training.data import list_images
+
+
+def synthetic_photos(count: int, size: int = 640) -> list[bytes]:
+    rng = np.random.default_rng(0)
+    photos = []
+    for _ in range(count):
+        # Low-frequency noise upscaled, so the images have structure like photos
+        small = rng.integers(0, 255, (8, 8, 3), dtype=np.uint8)
+        img = Image.fromarray(small).resize((size, size), Image.Resampling.BICUBIC)
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=90)
+        photos.append(buffer.getvalue())
+    return photos
+
+
+def variants(data: bytes) -> dict[str, bytes]:
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    out = {}
+    for name, quality, scale in (("q60", 60, 1.0), ("q30", 30, 1.0), ("half", 85, 0.5), ("quarter_q50", 50, 0.25)):
+        copy = img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale)))) if scale != 1 else img
+        buffer = io.BytesIO()
+        copy.save(buffer, format="JPEG", quality=quality)
+        out[name] = buffer.getvalue()
+    return out
+
+
+async def timing(photos: list[bytes]) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ImagePredictionCache("bench", path=f"{tmp}/cache.db", phash=True)
+        for data in photos:
+            await cache.set(image_digest(data), None, "other", 0.9)
+
+        hit, decode = [], []
+        for data in photos:
+            start = time.perf_counter()
+            await cache.get(image_digest(data))
+            hit.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            load_image(data)
+            decode.append(time.perf_counter() - start)
+        await cache.aclose()
+    return {
+        "exact_hit_ms": round(statistics.median(hit) * 1000, 3),
+        "decode_ms": round(statistics.median(decode) * 1000, 3),
+    }
+
+
+def matching(photos: list[bytes], distance: int) -> dict:
+    hashes = [difference_hash(load_image(data)) for data in photos]
+    results = {}
+    for data, original in zip(photos, hashes):
+        for name, copy in variants(data).items():
+            d = (difference_hash(load_image(copy)) ^ original).bit_count()
+            results.setdefault(name, []).append(d <= distance)
+
+    false_matches = sum(
+        (hashes[i] ^ hashes[j]).bit_count() <= distance
+        for i in range(len(hashes)) for j in range(i + 1, len(hashes))
+    )
+    pairs = len(hashes) * (len(hashes) - 1) // 2
+    return {
+        "distance": distance,
+        "match_rate": {name: round(sum(hits) / len(hits), 3) for name, hits in results.items()},
+        "false_match_rate": round(false_matches / pairs, 5) if pairs else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", help="directory of photos (default: synthetic)")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--distance", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args()
+
+    if args.images:
+        photos = [open(path, "rb").read() for path in list_images(args.images)[:args.limit]]
+    else:
+        photos = synthetic_photos(args.limit)
+
+    report = {"images": len(photos), **asyncio.run(timing(photos))}
+    report["phash"] = [matching(photos, d) for d in args.distance]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Per-stage cost of image preprocessing: the old inline path vs load_image.
+
+For synthetic JPEGs at a few photo sizes, times each stage of the old
+`Image.open -> convert -> resize -> np.array / 255.0` path and of
+load_image (draft decode, convert, resize, float32), and reports the
+output array size. Then measures how long the event loop stalls while
+`--requests` concurrent uploads are preprocessed inline vs through
+ImagePreprocessor.
+
+    python -m benchmarks.bench_image_preprocessing --repeat 20 --requests 32
+"""
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from app.ai.image_preprocessing import IMAGE_SIZE, ImagePreprocessor, load_image
+
+SIZES = {"vga": (640, 480), "2mp": (1600, 1200), "12mp_phone": (4032, 3024)}
+
+
+def jpeg(width: int, height: int) -> bytes:
+    # Smooth gradients plus noise compress like a photo, unlike pure noise
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+    noise = np.random.default_rng(0).integers(0, 32, (height, width, 3))
+    buffer = io.BytesIO()
+    Image.fromarray((base + noise).clip(0, 255).astype(np.uint8)).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def old_stages(data: bytes) -> tuple[dict, np.ndarray]:
+    timings = {}
+    start = time.perf_counter()
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    timings["decode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    img = img.convert("RGB")
+    timings["convert"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    img = img.resize(IMAGE_SIZE)
+    timings["resize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    array = np.array(img) / 255.0
+    timings["to_array"] = time.perf_counter() - start
+    return timings, array
+
+
+def new_stages(data: bytes) -> tuple[dict, np.ndarray]:
+    timings = {}
+    start = time.perf_counter()
+    img = Image.open(io.BytesIO(data))
+    img.draft("RGB", IMAGE_SIZE)
+    img.load()
+    timings["decode"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    img = ImageOps.exif_transpose(img).convert("RGB")
+    timings["convert"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    img = img.resize(IMAGE_SIZE, Image.Resampling.BILINEAR, reducing_gap=3.0)
+    timings["resize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    array = np.multiply(np.asarray(img, dtype=np.uint8), np.float32(1 / 255), dtype=np.float32)
+    timings["to_array"] = time.perf_counter() - start
+    return timings, array
+
+
+def stage_report(data: bytes, repeat: int) -> dict:
+    report = {}
+    for name, run in (("old", old_stages), ("new", new_stages)):
+        runs = [run(data) for _ in range(repeat)]
+        stages = {stage: round(statistics.median(t[stage] for t, _ in runs) * 1000, 2) for stage in runs[0][0]}
+        stages["total"] = round(sum(stages.values()), 2)
+        report[name] = {"ms": stages, "output": f"{runs[0][1].dtype} {runs[0][1].nbytes // 1024} KiB"}
+    # load_image itself, end to end
+    start = time.perf_counter()
+    for _ in range(repeat):
+        load_image(data)
+    report["load_image_ms"] = round((time.perf_counter() - start) / repeat * 1000, 2)
+    return report
+
+
+async def loop_stall(data: bytes, requests: int, preprocessor: ImagePreprocessor | None) -> dict:
+    """Longest gap between 1 ms ticks of a heartbeat task while the uploads are processed."""
+    stalls = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = loop.time()
+            stalls.append(now - last)
+            last = now
+
+    async def inline():
+        return old_stages(data)[1]
+
+    beat = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    if preprocessor is None:
+        await asyncio.gather(*(inline() for _ in range(requests)))
+    else:
+        await asyncio.gather(*(preprocessor.preprocess(data) for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await beat
+    return {"images_per_s": round(requests / elapsed, 1), "max_loop_stall_ms": round(max(stalls) * 1000, 1)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=32)
+    args = parser.parse_args()
+
+    images = {name: jpeg(*size) for name, size in SIZES.items()}
+    results = {"stages": {name: stage_report(data, args.repeat) for name, data in images.items()}}
+
+    phone = images["12mp_phone"]
+    results["event_loop"] = {"inline_old": await loop_stall(phone, args.requests, None)}
+    for kind in ("thread", "process"):
+        preprocessor = ImagePreprocessor(executor=kind)
+        await preprocessor.preprocess(phone)  # start the workers
+        results["event_loop"][f"{kind}_pool"] = await loop_stall(phone, args.requests, preprocessor)
+        await preprocessor.aclose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""
+Import time and time-to-ready of the API, each measured in a fresh interpreter.
+
+- import_s: `import app.main`
+- ready_s: import plus the FastAPI lifespan startup, with WARMUP_MODELS as given
+- slowest_imports: top modules by cumulative import time (python -X importtime)
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --warmup all
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def ready():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+
+ready_at = asyncio.run(ready())
+print(json.dumps({"import_s": round(imported - start, 3), "ready_s": round(ready_at - start, 3)}))
+"""
+
+
+def slowest_imports(top: int) -> list[dict]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  self_us | cumulative_us | module"
+        _, cumulative_us, module = line.split("|", 2)
+        rows.append({"module": module.strip(), "cumulative_ms": round(int(cumulative_us) / 1000, 1)})
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--warmup", default="", help="value for WARMUP_MODELS, e.g. 'all' or 'graph,labels'")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ, WARMUP_MODELS=args.warmup)
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, "-c", _PROBE], env=env, capture_output=True, text=True, check=True)
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    print(json.dumps({
+        "warmup": args.warmup or None,
+        "import_s": min(run["import_s"] for run in runs),
+        "ready_s": min(run["ready_s"] for run in runs),
+        "slowest_imports": slowest_imports(args.top),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
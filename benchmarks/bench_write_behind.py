@@ -0,0 +1,99 @@
+"""
+Sustained complaint write throughput: commit per complaint vs write-behind.
+
+`--tasks` coroutines each save `--complaints` complaints through
+save_complaint, first committing one by one on their own sessions (the
+default save step) and then through a WriteBehindQueue, against fresh SQLite
+files opened with make_engine. Reports complaints per second and save
+latency for each, "database is locked" failures, plus the speedup.
+
+    python -m benchmarks.bench_write_behind --tasks 64 --complaints 50 --durable 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, make_engine
+from app.models.complaint_model import Complaint  # noqa: F401  (registers the table on Base)
+from app.services.write_behind import WriteBehindQueue, save_complaint
+
+
+def _fields(n: int, i: int) -> dict:
+    return dict(
+        citizen_name=f"citizen {n}",
+        message=f"Synthetic complaint {i}",
+        complaint_type="noise",
+        reply="Synthetic reply",
+        action_taken="AI Responded",
+        status="done",
+    )
+
+
+async def run(path: str, tasks: int, complaints: int, writer_options: dict | None) -> dict:
+    engine = make_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    writer = WriteBehindQueue(session_factory, **writer_options) if writer_options is not None else None
+    latencies = []
+    failures = 0
+
+    async def client(n: int):
+        nonlocal failures
+        for i in range(complaints):
+            start = time.perf_counter()
+            try:
+                async with session_factory() as db:
+                    await save_complaint(db, _fields(n, i), writer=writer)
+            except OperationalError:
+                failures += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(tasks)))
+    if writer is not None:
+        await writer.aclose()
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+
+    latencies.sort()
+    return {
+        "saved": len(latencies),
+        "failures": failures,
+        "complaints_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 2) if latencies else None,
+        "p95_ms": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)], 2) if latencies else None,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=64)
+    parser.add_argument("--complaints", type=int, default=50)
+    parser.add_argument("--max-rows", type=int, default=200)
+    parser.add_argument("--max-delay-ms", type=float, default=20)
+    parser.add_argument("--durable", type=int, choices=(0, 1), default=1)
+    args = parser.parse_args()
+
+    writer_options = {"max_rows": args.max_rows, "max_delay_ms": args.max_delay_ms, "durable": bool(args.durable)}
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            "commit_per_complaint": await run(os.path.join(tmp, "direct.db"), args.tasks, args.complaints, None),
+            "write_behind": await run(os.path.join(tmp, "queued.db"), args.tasks, args.complaints, writer_options),
+        }
+    results["speedup"] = round(
+        results["write_behind"]["complaints_per_s"] / max(results["commit_per_complaint"]["complaints_per_s"], 1e-9), 1
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Check that a trained local classifier answers clear-cut complaints itself.
+
+Retrains and calibrates the local tier from `--db` exactly like
+`python -m app.ai.local_classifier`, saves it to a temporary file, loads it
+the way the app does and classifies a few unambiguous complaints through
+ComplaintClassifier with an LLM client that fails the check if it is
+called. Also reports how many of the bundled held-out examples the tier
+answers and how many of those are right. Exits non-zero on any failure.
+
+    python -m benchmarks.check_local_classifier --db smartcity.db
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from app.ai.complaint_classifier import ComplaintClassifier
+from app.ai.local_classifier import (
+    LocalComplaintClassifier,
+    canonical_category,
+    load_holdout_examples,
+    load_labelled_complaints,
+    train_calibrated,
+)
+
+CLEAR_CUT = [
+    ("Stray dogs barking all night on my street", "dogs"),
+    ("Loud music and shouting every night", "noise"),
+    ("Garbage not collected on my street", "city_services"),
+    ("No electricity since morning", "utilities"),
+]
+
+
+class ForbiddenLLM:
+    """Stands in for OllamaClient; any call means the local tier did not answer."""
+
+    base_url = "http://llm.invalid"
+    model = "none"
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_sync(self, prompt: str, **kwargs) -> str:
+        self.calls.append(prompt)
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default="smartcity.db")
+    args = parser.parse_args()
+
+    model, report = train_calibrated(load_labelled_complaints(args.db), load_holdout_examples())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "local_classifier.json")
+        model.save(path)
+        loaded = LocalComplaintClassifier.load(path)
+
+    problems = []
+    if loaded is None:
+        problems.append(f"no calibrated cutoff: {report}")
+    else:
+        llm = ForbiddenLLM()
+        classifier = ComplaintClassifier(client=llm, local=loaded)
+        for text, expected in CLEAR_CUT:
+            calls = len(llm.calls)
+            category = classifier.classify_complaint(text)
+            if len(llm.calls) > calls:
+                problems.append(f"went to the LLM: {text!r} (local: {loaded.predict(text)})")
+            elif category != expected:
+                problems.append(f"{text!r} -> {category}, expected {expected}")
+
+        answered = correct = 0
+        for text, label in load_holdout_examples():
+            category, confidence = loaded.predict(text)
+            if confidence >= classifier.threshold:
+                answered += 1
+                correct += category == canonical_category(label)
+        report["bundled_answered"] = answered
+        report["bundled_correct"] = correct
+
+    print(json.dumps(report, indent=2))
+    if problems:
+        print("local classifier check failed:\n  " + "\n  ".join(problems), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+A stand-in for the Ollama HTTP API with a configurable token rate.
+
+Answers /api/generate with NDJSON token streams (a category for
+classification prompts, a JSON object for `format: json`, an Arabic reply
+otherwise) and /api/embeddings with deterministic vectors. Used by the load
+test; can also run on its own:
+
+    python -m benchmarks.fake_ollama --port 11434 --token-rate 40
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import socket
+import threading
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+REPLY_WORDS = "شكرًا لتواصلك معنا ، تم استلام شكواك وسيتم تحويلها إلى القسم المختص ومتابعتها في أقرب وقت".split()
+EMBEDDING_DIM = 64
+
+
+def create_app(token_rate: float = 40.0, first_token_ms: float = 50.0) -> FastAPI:
+    """`token_rate` tokens per second per generation, after `first_token_ms` of prompt processing."""
+    app = FastAPI()
+
+    def answer(body: dict) -> list[str]:
+        prompt = body.get("prompt", "")
+        if "Classify this citizen complaint" in prompt:
+            return ["noise"]
+        if body.get("format") == "json":
+            reply = " ".join(REPLY_WORDS)
+            return [json.dumps({"category": "noise", "reply": reply}, ensure_ascii=False)]
+        return [word + " " for word in REPLY_WORDS]
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        tokens = answer(body)
+        prompt_tokens = len(body.get("prompt", "").split())
+
+        async def stream():
+            await asyncio.sleep(first_token_ms / 1000)
+            for token in tokens:
+                yield json.dumps({"response": token, "done": False}, ensure_ascii=False) + "\n"
+                await asyncio.sleep(1 / token_rate)
+            yield json.dumps({"response": "", "done": True, "prompt_eval_count": prompt_tokens, "eval_count": len(tokens)}) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.post("/api/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        seed = int.from_bytes(hashlib.sha256(body.get("prompt", "").encode()).digest()[:4], "little")
+        vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM)
+        return {"embedding": vector.tolist()}
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread:
+    """Runs an ASGI app under uvicorn on a background thread with its own event loop."""
+
+    def __init__(self, app, port: int | None = None):
+        self.port = port or free_port()
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="on")
+        self.server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 60.0):
+        self._thread.start()
+        self._thread.join(0.05)
+        waited = 0.0
+        while not self.server.started:
+            if not self._thread.is_alive() or waited > timeout:
+                raise RuntimeError(f"Server on port {self.port} did not start")
+            self._thread.join(0.05)
+            waited += 0.05
+
+    def stop(self):
+        self.server.should_exit = True
+        self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--token-rate", type=float, default=40.0, help="tokens per second per generation")
+    parser.add_argument("--first-token-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.token_rate, args.first_token_ms), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+End-to-end load test of the API with stubbed models.
+
+Boots the real FastAPI app in-process (uvicorn on a background thread, full
+lifespan, throwaway SQLite file) with a fake Ollama server, a stub Whisper
+pool and a tiny Keras model registered in place of the real ones, then
+drives POST /, /voice and /image at `--concurrency` and prints throughput,
+p50/p95/p99 latency and peak RSS per endpoint as JSON. The classifier and
+responder are registered without the local tier and result caches, so every
+request pays for its LLM calls. /voice is skipped when ffmpeg is missing.
+
+    python -m benchmarks.load_test --concurrency 16 --requests 200 --token-rate 40 --out run.json
+"""
+import os
+import tempfile
+
+# Before the app is imported: these are read at import time
+_TMP = tempfile.mkdtemp(prefix="loadtest-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(_TMP, 'loadtest.db')}")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every /image request uploads the same JPEG; measure the model, not the cache
+os.environ.setdefault("IMAGE_CACHE_ENABLED", "0")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import io  # noqa: E402
+import json  # noqa: E402
+import math  # noqa: E402
+import platform  # noqa: E402
+import resource  # noqa: E402
+import shutil  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+import wave  # noqa: E402
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from app.ai.audio_stream import SAMPLE_RATE  # noqa: E402
+from app.ai.complaint_classifier import ComplaintClassifier  # noqa: E402
+from app.ai.complaint_responder import ComplaintResponder  # noqa: E402
+from app.ai.llm_client import OllamaClient  # noqa: E402
+from app.core.registry import get_model_registry  # noqa: E402
+from benchmarks.bench_image_batching import tiny_model  # noqa: E402
+from benchmarks.fake_ollama import ServerThread, create_app  # noqa: E402
+
+LABELS = {0: "accident", 1: "fight", 2: "fire", 3: "garbage", 4: "other"}
+
+
+class StubTranscriptionPool:
+    """Whisper stand-in: waits `real_time_factor` x audio length and returns fixed text."""
+
+    def __init__(self, real_time_factor: float = 0.1):
+        self.real_time_factor = real_time_factor
+        self.jobs = 0
+
+    async def transcribe(self, audio: np.ndarray, language: str | None = "en") -> dict:
+        self.jobs += 1
+        await asyncio.sleep(len(audio) / SAMPLE_RATE * self.real_time_factor)
+        return {"text": "The street lights on my road have been off for a week", "segments": []}
+
+    async def warm_up(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"stub": True, "jobs": self.jobs}
+
+    async def aclose(self):
+        pass
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process (server and load generator)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def wav_bytes(seconds: float) -> bytes:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    samples = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def jpeg_bytes(size: int = 640) -> bytes:
+    pixels = np.random.default_rng(0).integers(0, 255, (size, size, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def install_stubs(llm_url: str, real_time_factor: float):
+    registry = get_model_registry()
+    llm = OllamaClient(base_url=f"{llm_url}/api/generate")
+    registry.register("llm_client", llm)
+    registry.register("classifier", ComplaintClassifier(client=llm))
+    registry.register("responder", ComplaintResponder(client=llm))
+    registry.register("transcription_pool", StubTranscriptionPool(real_time_factor))
+    registry.register("image_model", tiny_model(len(LABELS)))
+    registry.register("labels", LABELS)
+
+
+async def drive(client: httpx.AsyncClient, name: str, send, requests: int, concurrency: int) -> dict:
+    for _ in range(min(concurrency, 4)):  # warm-up, not measured
+        await send(client, -1)
+
+    latencies, errors = [], 0
+    todo = iter(range(requests))
+    peak_rss = rss_mb()
+    done = asyncio.Event()
+
+    async def sample_memory():
+        nonlocal peak_rss
+        while not done.is_set():
+            peak_rss = max(peak_rss, rss_mb())
+            await asyncio.sleep(0.05)
+
+    async def worker():
+        nonlocal errors
+        for i in todo:
+            start = time.perf_counter()
+            try:
+                response = await send(client, i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += not ok
+
+    sampler = asyncio.create_task(sample_memory())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await sampler
+
+    latencies.sort()
+    return {
+        "endpoint": name,
+        "requests": requests,
+        "errors": errors,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+
+
+async def run_scenarios(base_url: str, args) -> list[dict]:
+    audio = wav_bytes(args.audio_seconds)
+    image = jpeg_bytes()
+
+    async def text(client, i):
+        body = {"citizen_name": f"citizen {i}", "message": f"Loud music every night from the flat above ({i})"}
+        return await client.post("/api/v1/complaints/", json=body)
+
+    async def voice(client, i):
+        files = {"audio_file": ("complaint.wav", audio, "audio/wav")}
+        return await client.post("/api/v1/complaints/voice", data={"citizen_name": f"citizen {i}"}, files=files)
+
+    async def image_upload(client, i):
+        files = {"image_file": ("incident.jpg", image, "image/jpeg")}
+        return await client.post("/api/v1/complaints/image", data={"citizen_name": f"citizen {i}"}, files=files)
+
+    scenarios = {"/": text, "/voice": voice, "/image": image_upload}
+    if "/voice" in args.endpoints and shutil.which("ffmpeg") is None:
+        print("ffmpeg not found; skipping /voice", file=sys.stderr)
+        args.endpoints.remove("/voice")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        return [
+            await drive(client, name, scenarios[name], args.requests, args.concurrency)
+            for name in args.endpoints
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--endpoints", nargs="+", default=["/", "/voice", "/image"], choices=["/", "/voice", "/image"])
+    parser.add_argument("--token-rate", type=float, default=40.0, help="fake Ollama tokens per second")
+    parser.add_argument("--first-token-ms", type=float, default=50.0)
+    parser.add_argument("--audio-seconds", type=float, default=5.0)
+    parser.add_argument("--whisper-rtf", type=float, default=0.1, help="stub Whisper seconds per audio second")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--out", help="also write the report to this file")
+    args = parser.parse_args()
+
+    ollama = ServerThread(create_app(args.token_rate, args.first_token_ms))
+    ollama.start()
+    install_stubs(ollama.url, args.whisper_rtf)
+
+    from app.main import app
+
+    api = ServerThread(app)
+    api.start()
+    try:
+        results = asyncio.run(run_scenarios(api.url, args))
+    finally:
+        api.stop()
+        ollama.stop()
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+    report = {
+        "config": {
+            key: getattr(args, key)
+            for key in ("concurrency", "requests", "token_rate", "first_token_ms", "audio_seconds", "whisper_rtf")
+        },
+        "machine": {"python": platform.python_version(), "cpus": os.cpu_count(), "platform": platform.platform()},
+        "results": results,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Smoke check for POST /api/v1/complaints/bulk and GET /export over real HTTP.
+
+Boots the app like the load test (uvicorn thread, throwaway SQLite, fake
+Ollama, stubbed models), uploads `--lines` JSON Lines complaints plus one
+invalid line, and checks the NDJSON response: every valid line saved, the
+invalid one reported, a final progress record, and every returned id
+readable through GET /{id}. Then exports them again: GET /export must
+return each saved id exactly once, newest first, and a `citizen_name`
+filter must narrow it to that citizen's complaint. Exits non-zero on any
+mismatch.
+
+    python -m benchmarks.smoke_bulk --lines 50
+    python -m benchmarks.smoke_bulk --lines 1200   # export spans several pages
+"""
+from benchmarks.load_test import _TMP, install_stubs  # sets DATABASE_URL before the app is imported
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import shutil  # noqa: E402
+import sys  # noqa: E402
+
+import httpx  # noqa: E402
+
+from benchmarks.fake_ollama import ServerThread, create_app  # noqa: E402
+
+
+def check(base_url: str, lines: int, timeout: float) -> list[str]:
+    body = "\n".join(
+        json.dumps({"citizen_name": f"citizen {i}", "message": f"Garbage not collected on street {i}"})
+        for i in range(lines)
+    ) + "\n{not json}\n"
+
+    with httpx.Client(base_url=base_url, timeout=timeout) as client:
+        response = client.post(
+            "/api/v1/complaints/bulk", content=body.encode(), headers={"Content-Type": "application/x-ndjson"}
+        )
+        records = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+        saved = [r for r in records if r.get("event") == "item" and r.get("status") == "saved"]
+        missing = [r["id"] for r in saved if client.get(f"/api/v1/complaints/{r['id']}").status_code != 200]
+        export = client.get("/api/v1/complaints/export")
+        filtered = client.get("/api/v1/complaints/export", params={"citizen_name": "citizen 0"})
+
+    problems = []
+    if response.status_code != 200:
+        problems.append(f"status {response.status_code}")
+    errors = [r for r in records if r.get("event") == "item" and r.get("status") == "error"]
+    final = records[-1] if records else {}
+    if len(saved) != lines:
+        problems.append(f"{len(saved)} of {lines} lines saved")
+    if [r["line"] for r in errors] != [lines + 1]:
+        problems.append(f"expected one error on line {lines + 1}, got {errors}")
+    if not (final.get("event") == "progress" and final.get("done") and final.get("saved") == lines):
+        problems.append(f"bad final progress record {final}")
+    if missing:
+        problems.append(f"saved ids not found afterwards: {missing[:10]}")
+    problems.extend(check_export(export, filtered, [r["id"] for r in saved]))
+    return problems
+
+
+def check_export(export: httpx.Response, filtered: httpx.Response, saved_ids: list[int]) -> list[str]:
+    problems = []
+    for response in (export, filtered):
+        if response.status_code != 200:
+            problems.append(f"export {response.url}: status {response.status_code} {response.text[:200]}")
+            return problems
+        if not response.headers.get("content-type", "").startswith("application/x-ndjson"):
+            problems.append(f"export {response.url}: content-type {response.headers.get('content-type')}")
+
+    ids = [json.loads(line)["id"] for line in export.text.splitlines() if line.strip()]
+    if sorted(ids) != sorted(saved_ids):
+        problems.append(f"export returned {len(ids)} ids ({len(set(ids))} distinct), expected {len(saved_ids)}")
+    if ids != sorted(ids, reverse=True):
+        problems.append("export is not newest first")
+
+    rows = [json.loads(line) for line in filtered.text.splitlines() if line.strip()]
+    if [row["citizen_name"] for row in rows] != ["citizen 0"]:
+        problems.append(f"citizen_name filter returned {[row['citizen_name'] for row in rows][:10]}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    ollama = ServerThread(create_app(token_rate=2000.0, first_token_ms=1.0))
+    ollama.start()
+    install_stubs(ollama.url, real_time_factor=0.0)
+
+    from app.main import app
+
+    api = ServerThread(app)
+    api.start()
+    try:
+        problems = check(api.url, args.lines, args.timeout)
+    finally:
+        api.stop()
+        ollama.stop()
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+    if problems:
+        print("bulk smoke check failed:\n  " + "\n  ".join(problems), file=sys.stderr)
+        sys.exit(1)
+    print(f"bulk smoke check passed: {args.lines} lines saved, invalid line reported, export matches")
+
+
+if __name__ == "__main__":
+    main()